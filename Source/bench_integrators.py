@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Benchmark: Integrators
+
+Computes the accuracy and the running time of the integrators on Keplerian 
+orbits, for a grid of (method, step size, eccentricity) cells evaluated in a 
+process pool. The results are written as a table (JSON and NPZ), and plotted 
+by plot_integrators.py.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+bench_integrators.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import json
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import integrator as itg
+import high_order as ho
+import initial_conditions as init
+import potentials as pot
+
+OUT_DIR = "./Output/"
+FILENAME = "bench_integrators"
+T_FINAL = 8.0
+N_REPEAT = 3
+h_range = np.append(np.logspace(-3.5, -0.1, 25), 0.001)
+e_range = np.array([0., 0.5, 0.9])
+
+METHODS = {"Euler": itg.euler,
+           "RK2": itg.rk2,
+           "RK4": itg.rk4,
+           "DOP853": ho.dop853,
+           "Radau15": ho.gauss_radau,
+           "BS12": ho.bulirsch_stoer}
+# Smallest step size for each method: the high-order methods reach the 
+# machine precision at larger steps, and are too slow below
+H_MIN = {"DOP853": 1e-2,
+         "Radau15": 1e-2,
+         "BS12": 1e-2}
+
+def kepler_orbit(e: float) -> np.ndarray:
+    """Initial conditions of a Kepler orbit of semi-major axis 1 and 
+    eccentricity e, at its pericentre (e = 0 gives [1, 0, 0, 1])
+    @ params:
+        - e: eccentricity
+    @ returns:
+        - W0: phase-space vector
+    """
+    return init.one_part(1 - e, 0, 0, np.sqrt((1 + e)/(1 - e)))
+
+def run_cell(method: str, 
+             h: float, 
+             e: float, 
+             T_final: float = T_FINAL,
+             N_repeat: int = N_REPEAT) -> dict:
+    """Integrates one orbit with one method and one step size, and compares
+    the result with the analytical solution.
+    @ params:
+        - method: name of the method (key of METHODS)
+        - h: step size
+        - e: eccentricity of the orbit
+        - T_final: duration of the integration
+        - N_repeat: number of timed runs (the minimum time is kept)
+    @ returns:
+        - a row of the results table
+    """
+    W0 = kepler_orbit(e)
+    N = int(T_final / h)
+    t_ana, W_ana = itg.kepler_eccentric(0, W0, h, N)
+    E_ana = pot.KEPLER.energy(np.moveaxis(W_ana, 0, -1))
+    times = []
+    with np.errstate(all="ignore"):
+        for i in range(N_repeat):
+            start_time = time.perf_counter()
+            t_num, W_num = itg.integrator_type(0, W0, h, N, 
+                                               pot.kepler_evolution, 
+                                               METHODS[method])
+            times.append(time.perf_counter() - start_time)
+        E_num = pot.KEPLER.energy(np.moveaxis(W_num, 0, -1))
+        err_E = np.max(np.abs(E_ana - E_num))
+        err_pos = np.sqrt(np.sum((W_num[-1, 0] - W_ana[-1, 0])**2))
+    return {"method": method,
+            "h": float(h),
+            "e": float(e),
+            "n_steps": N,
+            "time": float(np.min(times)),
+            "time_mean": float(np.mean(times)),
+            "time_std": float(np.std(times)),
+            "err_energy": float(err_E),
+            "err_position": float(err_pos)}
+
+def run_benchmark(methods: list = list(METHODS),
+                  h_range: np.ndarray = h_range,
+                  e_range: np.ndarray = e_range,
+                  T_final: float = T_FINAL,
+                  N_repeat: int = N_REPEAT,
+                  max_workers: int = None) -> list:
+    """Evaluates all the (method, h, e) cells in a process pool
+    @ params:
+        - methods: names of the methods (keys of METHODS)
+        - h_range: step sizes
+        - e_range: eccentricities
+        - T_final: duration of the integrations
+        - N_repeat: number of timed runs of each cell
+        - max_workers: number of processes (all the cores if None)
+    @ returns:
+        - results: list of the rows of the results table
+    """
+    cells = [(m, h, e) for m in methods for h in h_range for e in e_range
+             if h >= H_MIN.get(m, 0)]
+    # Longest cells first, for a better balance between the workers
+    cells.sort(key=lambda cell: cell[1])
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run_cell, m, h, e, T_final, N_repeat) 
+                   for (m, h, e) in cells]
+        results = [f.result() for f in futures]
+    results.sort(key=lambda row: (row["method"], row["e"], row["h"]))
+    return results
+
+def save_results(results: list, 
+                 filename: str = OUT_DIR + FILENAME) -> None:
+    """Saves the results table as JSON (list of rows) and NPZ (columns)
+    @ params:
+        - results: list of the rows of the results table
+        - filename: path without extension
+    """
+    with open(filename + ".json", "w") as file:
+        json.dump(results, file, indent=1)
+    np.savez(filename + ".npz", 
+             **{key: np.array([row[key] for row in results]) 
+                for key in results[0]})
+
+def load_results(filename: str = OUT_DIR + FILENAME) -> list:
+    """Loads the results table saved by save_results
+    @ params:
+        - filename: path without extension
+    @ returns:
+        - results: list of the rows of the results table
+    """
+    with open(filename + ".json") as file:
+        return json.load(file)
+
+def select(results: list, **criteria) -> dict:
+    """Selects the rows of the results matching the criteria, as columns
+    @ params:
+        - results: list of the rows of the results table
+        - criteria: column = value
+    @ returns:
+        - dictionary of columns (arrays)
+    """
+    rows = [row for row in results 
+            if all(row[key] == value for key, value in criteria.items())]
+    if len(rows) == 0:
+        return {}
+    return {key: np.array([row[key] for row in rows]) for key in rows[0]}
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    save_results(results)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""
+Command Line Interface
+
+Single entry point of the project, with one subcommand per computation 
+(sections, area, gm, bench, plot, ...) in place of the shell wrappers. The 
+scripts are only imported when their subcommand runs, and the import time of 
+the compute modules can be checked against a budget.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+cli.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+import sys
+import time
+import runpy
+import argparse
+import subprocess
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Modules imported by the computations (and by each worker process): they 
+# must not load the plotting libraries nor SciPy
+COMPUTE_MODULES = ["potentials",
+                   "integrator",
+                   "initial_conditions",
+                   "poincare_sections",
+                   "escape",
+                   "high_order",
+                   "taylor",
+                   "parareal",
+                   "main_poincare_sections_parallel",
+                   "main_area",
+                   "gottwald_melbourne",
+                   "work_queue"]
+HEAVY_MODULES = ["matplotlib", "scipy"]
+IMPORT_BUDGET = 0.5 # s, measured in a new interpreter
+TESTS = {"potentials": "test_potentials.py",
+         "evolution": "test_evolution.py",
+         "evolution_chaotic": "test_evolution_chaotic.py",
+         "initial_E": "test_initial_E.py",
+         "output_stride": "test_output_stride.py",
+         "adaptive": "test_adaptive.py"}
+PLOTS = {"sections": "plot_poincare_sections.py",
+         "zoom": "plot_poincare_sections_zoom.py",
+         "area": "plot_area.py",
+         "integrators": "plot_integrators.py"}
+
+def run_script(script: str, *args: str) -> int:
+    """Runs a script of the Source directory as __main__, with the given 
+    command line arguments"""
+    argv = sys.argv
+    sys.argv = [script] + list(args)
+    try:
+        runpy.run_path(os.path.join(SOURCE_DIR, script), run_name="__main__")
+    finally:
+        sys.argv = argv
+    return 0
+
+def import_time(modules: list = COMPUTE_MODULES) -> tuple:
+    """Measures the import time of modules in a new interpreter
+    @ params:
+        - modules: names of the modules
+    @ returns:
+        - duration (s)
+        - heavy: the modules of HEAVY_MODULES that were loaded
+    """
+    code = ("import sys, time\n"
+            "t = time.perf_counter()\n"
+            "import {}\n"
+            "t = time.perf_counter() - t\n"
+            "print(t, *[m for m in {!r} if m in sys.modules])"
+            ).format(", ".join(modules), HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], cwd=SOURCE_DIR,
+                            capture_output=True, text=True, check=True)
+    duration, *heavy = output.stdout.split()
+    return float(duration), heavy
+
+def cmd_sections(args) -> int:
+    if args.linear:
+        run_script("main_poincare_sections_linear.py")
+    else:
+        run_script("main_poincare_sections_parallel.py")
+    if not args.no_plot:
+        run_script(PLOTS["sections"], "L" if args.linear else "P")
+    return 0
+
+def cmd_area(args) -> int:
+    run_script("main_area.py")
+    if not args.no_plot:
+        run_script(PLOTS["area"])
+    return 0
+
+def cmd_gm(args) -> int:
+    return run_script("gottwald_melbourne.py")
+
+def cmd_bench(args) -> int:
+    return run_script("test_integrators.py")
+
+def cmd_plot(args) -> int:
+    return run_script(PLOTS[args.figure], *args.args)
+
+def cmd_test(args) -> int:
+    return run_script(TESTS[args.name])
+
+def cmd_time(args) -> int:
+    return run_script("time_poincare_sections.py")
+
+def cmd_queue(args) -> int:
+    return run_script("work_queue.py", args.path, args.task)
+
+def cmd_imports(args) -> int:
+    duration, heavy = import_time()
+    print("Compute modules imported in {:.3f} s (budget: {:.3f} s)"
+          .format(duration, args.budget))
+    if heavy:
+        print("Heavy modules loaded: {}".format(", ".join(heavy)))
+    return int(duration > args.budget or len(heavy) > 0)
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Order and Chaos in a 2D potential")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cmd = sub.add_parser("sections", help="Poincaré sections")
+    cmd.add_argument("--linear", action="store_true", 
+                     help="linear algorithm (much slower)")
+    cmd.add_argument("--no-plot", action="store_true")
+    cmd.set_defaults(func=cmd_sections)
+
+    cmd = sub.add_parser("area", help="phase-space distances and area")
+    cmd.add_argument("--no-plot", action="store_true")
+    cmd.set_defaults(func=cmd_area)
+
+    cmd = sub.add_parser("gm", help="Gottwald-Melbourne test")
+    cmd.set_defaults(func=cmd_gm)
+
+    cmd = sub.add_parser("bench", help="benchmark of the integrators")
+    cmd.set_defaults(func=cmd_bench)
+
+    cmd = sub.add_parser("plot", help="figures from the saved outputs")
+    cmd.add_argument("figure", choices=list(PLOTS))
+    cmd.add_argument("args", nargs="*", 
+                     help="arguments of the script (e.g. P, L or B, then "
+                          "for zoom 1/E=ymin,ymax,vmin,vmax windows)")
+    cmd.set_defaults(func=cmd_plot)
+
+    cmd = sub.add_parser("test", help="tests of the potentials, evolution "
+                                      "and initial conditions")
+    cmd.add_argument("name", choices=list(TESTS))
+    cmd.set_defaults(func=cmd_test)
+
+    cmd = sub.add_parser("time", help="running time of the Poincaré "
+                                      "sections (parallel vs. linear)")
+    cmd.set_defaults(func=cmd_time)
+
+    cmd = sub.add_parser("queue", help="fills a work queue and runs a "
+                                       "worker (see work_queue.py)")
+    cmd.add_argument("path", nargs="?", default="./Output/queue/")
+    cmd.add_argument("task", nargs="?", default="sections", 
+                     choices=["sections", "mu"])
+    cmd.set_defaults(func=cmd_queue)
+
+    cmd = sub.add_parser("imports", help="checks the import time of the "
+                                         "compute modules")
+    cmd.add_argument("--budget", type=float, default=IMPORT_BUDGET)
+    cmd.set_defaults(func=cmd_imports)
+    return parser
+
+def main(argv: list = None) -> int:
+    args = parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Energy Monitor
+
+Online monitor of the energy drift of each particle during the integration: 
+the relative drift is checked every few steps with a fused evaluation of the 
+total energy, the particles above a tolerance are flagged, and can be 
+integrated again with a smaller step or a higher-order method.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+energy_monitor.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+import potentials as pot
+import integrator as itg
+
+DRIFT_TOL = 1e-6
+N_CHECK = 100
+E_FLOOR = 1e-10 # energy scale of the relative drift of particles at E ~ 0
+
+def relative_drift(E: np.ndarray, E0: np.ndarray) -> np.ndarray:
+    """Relative energy drift |E - E0|/|E0|"""
+    return np.abs(E - E0)/np.maximum(np.abs(E0), E_FLOOR)
+
+def integrate_monitored(t0: float,
+                        W0: np.ndarray,
+                        h: float,
+                        n: int,
+                        func,
+                        step = itg.rk4_step,
+                        potential: pot.Potential = pot.HH,
+                        tol: float = DRIFT_TOL,
+                        N_check: int = N_CHECK,
+                        refine_step = None,
+                        refine_factor: int = 1) -> tuple:
+    """Integrates particles while monitoring their energy drift; the 
+    particles whose drift goes above tol are flagged and, if refine_step or
+    refine_factor is given, integrated again from the start with this step
+    function and a step h/refine_factor.
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]] of N particles
+        - h: step size (time step)
+        - n: number of steps
+        - func: RHS of differential equation
+        - step: one step of the integrator (e.g. integrator.rk4_step)
+        - potential: potential of func, for the energy
+        - tol: largest relative energy drift
+        - N_check: number of steps between two checks
+        - refine_step: step of the integrator of the flagged particles 
+          (e.g. high_order.dop853_step), step if None
+        - refine_factor: number of substeps of the flagged particles
+    @returns: 
+        - W: final state of each particle
+        - drift: largest relative energy drift of each particle (at the 
+          checks, after the refinement for the flagged ones)
+        - flagged: particles above tol in the first integration
+    """
+    if np.ndim(W0) == 2:
+        # Single particle: integrated as a batch of one
+        W, drift, flagged = integrate_monitored(
+            t0, np.asarray(W0)[..., np.newaxis], h, n, func, step, potential,
+            tol, N_check, refine_step, refine_factor)
+        return W[..., 0], drift[0], flagged[0]
+    E0 = potential.energy(W0)
+    drift = np.zeros(np.shape(E0))
+    w = W0
+    t = t0
+    i = 0
+    with np.errstate(invalid="ignore", over="ignore"):
+        while i < n:
+            m = min(N_check, n - i)
+            for j in range(m):
+                w = step(t, w, h, func)
+                t = t + h
+            i += m
+            # nan (a particle that escaped to infinity) is kept
+            drift = np.maximum(drift, relative_drift(potential.energy(w), E0))
+    flagged = ~(drift <= tol)
+    if np.any(flagged) and (refine_step is not None or refine_factor > 1):
+        W_ref, drift_ref, _ = integrate_monitored(
+            t0, W0[..., flagged], h/refine_factor, n*refine_factor, func,
+            step if refine_step is None else refine_step, potential, tol,
+            N_check*refine_factor)
+        w = np.array(w)
+        w[..., flagged] = W_ref
+        drift[flagged] = drift_ref
+    return w, drift, flagged
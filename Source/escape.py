@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Escape
+
+Integrates unbound orbits (E >= 1/6 in the Hénon-Heiles potential) and detects 
+escapes: escaped particles are removed from the integrated batch, and their 
+escape time and exit channel are recorded.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+escape.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+import potentials as pot
+import integrator as itg
+
+R_ESC = 2
+N_CHECK = 10
+# Directions of the exit channels (saddles) of the Hénon-Heiles potential
+HH_CHANNELS = np.array([np.pi/2, 7*np.pi/6, 11*np.pi/6])
+
+def escaped(W: np.ndarray,
+            r_esc: float = R_ESC,
+            E_esc: float = None,
+            potential = None) -> np.ndarray:
+    """Escape criterion: the particle is beyond the escape radius, or (if 
+    E_esc is given) the potential at its position is below E_esc, or its 
+    state is not finite or larger than potentials.MAX_VAL.
+    @ params:
+        - W: phase-space vector [[x, y], [u, v]]
+        - r_esc: escape radius
+        - E_esc: escape potential (not used if None)
+        - potential: potential for the energy criterion
+    @ returns:
+        - mask of the escaped particles
+    """
+    X = W[0, 0]
+    Y = W[0, 1]
+    with np.errstate(invalid="ignore", over="ignore"):
+        out = (X**2 + Y**2 > r_esc**2) \
+                | ~np.all(np.isfinite(W), axis=(0, 1)) \
+                | np.any(np.abs(W) > pot.MAX_VAL, axis=(0, 1))
+        if E_esc is not None:
+            out |= potential(W) < E_esc
+    return out
+
+def exit_channel(W: np.ndarray, channels: np.ndarray = HH_CHANNELS):
+    """Exit channel of escaped particles: the channel closest in direction
+    to their position
+    @ params:
+        - W: phase-space vector [[x, y], [u, v]]
+        - channels: directions of the channels
+    @ returns:
+        - index of the channel of each particle
+    """
+    theta = np.arctan2(W[0, 1], W[0, 0])
+    diff = np.angle(np.exp(1j*(theta[..., np.newaxis] - channels)))
+    return np.argmin(np.abs(diff), axis=-1)
+
+def integrate_escape(t0: float,
+                     W0: np.ndarray,
+                     h: float,
+                     n: int,
+                     func,
+                     step = itg.rk4_step,
+                     r_esc: float = R_ESC,
+                     E_esc: float = None,
+                     potential = pot.hh_potential,
+                     channels: np.ndarray = HH_CHANNELS,
+                     N_check: int = N_CHECK) -> tuple:
+    """Integrates particles until they escape or n steps are done. The 
+    escape is recorded at the first step where the criterion holds, and 
+    every N_check steps the escaped particles are removed from the batch, 
+    so that only the remaining ones are integrated.
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]] of N particles
+        - h: step size (time step)
+        - n: number of steps
+        - func: RHS of differential equation
+        - step: one step of the integrator (e.g. integrator.rk4_step)
+        - r_esc: escape radius (see escaped)
+        - E_esc: escape potential (see escaped)
+        - potential: potential for the energy criterion
+        - channels: directions of the exit channels
+        - N_check: number of steps between two removals of the escaped 
+          particles
+    @returns: 
+        - t_esc: escape time of each particle (inf if it did not escape)
+        - channel: exit channel of each particle (-1 if it did not escape)
+        - W: final state of each particle (at its escape, or at the end)
+    """
+    N = np.shape(W0)[-1]
+    W = np.array(W0, dtype=float)
+    t_esc = np.full(N, np.inf)
+    channel = np.full(N, -1)
+    active = np.arange(N)
+    w = W[..., active]
+    t = t0
+    i = 0
+    while i < n and len(active) > 0:
+        n_step = min(N_check, n - i)
+        found = np.zeros(len(active), dtype=bool)
+        for j in range(n_step):
+            with np.errstate(invalid="ignore", over="ignore"):
+                w = step(t, w, h, func)
+            t = t + h
+            out = escaped(w, r_esc, E_esc, potential) & ~found
+            if np.any(out):
+                index = active[out]
+                t_esc[index] = t
+                channel[index] = exit_channel(w[..., out], channels)
+                W[..., index] = w[..., out]
+                found |= out
+        i += n_step
+        active = active[~found]
+        w = w[..., ~found]
+    W[..., active] = w
+    return t_esc, channel, W
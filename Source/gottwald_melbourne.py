@@ -32,12 +32,12 @@ along with this program. If not, see https://www.gnu.org/licenses/.
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import cumulative_trapezoid
 
 import potentials as pot
 import integrator as itg
 import initial_conditions as init
+import parareal as pr
+import planner as pln
 
 # -----------------------------------------------------------------------------------
 # Parameters
@@ -45,31 +45,41 @@ import initial_conditions as init
 DEFAULT_N_iter = 30000
 DEFAULT_h = 0.01
 DEFAULT_c = 1.7
+DEFAULT_stride = 1 # steps between two saved states
+PARAREAL = False # single orbits integrated in parallel in time
 
 E_all = np.array([1/100, 1/12, 1/10, 1/8, 1/6])
 
-if "YII_1" in plt.style.available: plt.style.use("YII_1")
-
 # -----------------------------------------------------------------------------------
 # 1) Integrate Hénon–Heiles and Return x(t), etc.
 # -----------------------------------------------------------------------------------
 def compute_coordinates(E: float,
                         N_iter: int = DEFAULT_N_iter,
                         h: float = DEFAULT_h,
-                        N_part: int = 1) -> tuple:
+                        N_part: int = 1,
+                        parareal: bool = PARAREAL,
+                        stride: int = DEFAULT_stride) -> tuple:
     """
     Integrate Hénon–Heiles for N_iter steps at step size h for a single
-    random initial condition at energy E.
+    random initial condition at energy E (with the Parareal driver over all 
+    the cores if parareal is True), saving every stride steps.
     Returns:
-      t_part: array of times of length N_iter
-      x_part, y_part, u_part, v_part: arrays of length N_iter each
+      t_part: array of times of length N_iter // stride
+      x_part, y_part, u_part, v_part: arrays of length N_iter // stride each
     """
     # Generate 1 initial condition at energy E
     W_init = init.n_energy_part(pot.hh_potential, N_part, E)
     W0 = W_init[:, :, 0]  # take first particle
 
     # Perform integration using RK4
-    final_t, sol_array = itg.rk4(0.0, W0, h, N_iter, pot.hh_evolution)
+    if parareal:
+        final_t, sol_array = pr.parareal(0.0, W0, h, N_iter, 
+                                         pot.hh_evolution)
+        final_t = final_t[stride-1::stride]
+        sol_array = sol_array[stride-1::stride]
+    else:
+        final_t, sol_array = itg.rk4(0.0, W0, h, N_iter, pot.hh_evolution,
+                                     stride=stride)
     # Reconstruct the time array using step size and number of iterations
 
     # Extract coordinate arrays
@@ -84,6 +94,7 @@ def compute_coordinates(E: float,
 # 2) Compute theta(t_i) in discrete form
 # -----------------------------------------------------------------------------------
 def compute_theta_discrete(t_array, x_array, c=DEFAULT_c):
+    from scipy.integrate import cumulative_trapezoid
     int_x = cumulative_trapezoid(x_array, t_array, initial=0.0)
     theta_array = c * t_array + int_x
     return theta_array
@@ -92,28 +103,95 @@ def compute_theta_discrete(t_array, x_array, c=DEFAULT_c):
 # 3) Compute p(t_i) in discrete form
 # -----------------------------------------------------------------------------------
 def compute_p_discrete(t_array, x_array, theta_array):
+    from scipy.integrate import cumulative_trapezoid
     integrand = x_array * np.cos(theta_array)
     p_array = cumulative_trapezoid(integrand, t_array, initial=0.0)
     return p_array
 
+# -----------------------------------------------------------------------------------
+# 4) Compute p(t) in time chunks that fit in the memory budget
+# -----------------------------------------------------------------------------------
+def compute_p_chunked(E: float,
+                      N_iter: int = DEFAULT_N_iter,
+                      h: float = DEFAULT_h,
+                      c: float = DEFAULT_c,
+                      stride: int = DEFAULT_stride,
+                      budget: int = None) -> tuple:
+    """
+    Same as compute_coordinates, compute_theta_discrete and compute_p_discrete
+    for a single random initial condition at energy E, but the orbit is 
+    integrated in time chunks that fit in the memory budget (see pln.plan): 
+    only t and p are kept for the whole run, and the integrals are carried 
+    from one chunk to the next.
+    Returns:
+      t_part, p_part: arrays of length N_iter // stride each
+    """
+    from scipy.integrate import cumulative_trapezoid
+    W_init = init.n_energy_part(pot.hh_potential, 1, E)
+    w = W_init[:, :, 0]
+    n_out = N_iter//stride
+    t_part = np.zeros(n_out)
+    p_part = np.zeros(n_out)
+    if budget is None:
+        budget = pln.default_budget()
+    # The output arrays t and p are outside of the chunks
+    N_chunk, n_chunk = pln.plan("gm", n_out, 1, 
+                                max(budget - 2*pln.FLOAT_BYTES*n_out, 0))
+    n_chunk = max(n_chunk, 1)
+    t = 0.0
+    j = 0
+    last = None # t, x, integral of x and integrand at the last saved state
+    while j < n_out:
+        m = min(n_chunk, n_out - j)
+        t_chunk, sol_chunk = itg.rk4(t, w, h, m*stride, pot.hh_evolution,
+                                     stride=stride)
+        x_chunk = sol_chunk[:, 0, 0]
+        if last is None:
+            # The integrals start at the first saved state
+            int_x = cumulative_trapezoid(x_chunk, t_chunk, initial=0.0)
+            theta = c*t_chunk + int_x
+            integrand = x_chunk*np.cos(theta)
+            p = cumulative_trapezoid(integrand, t_chunk, initial=0.0)
+        else:
+            t_prev, x_prev, int_x_prev, integrand_prev, p_prev = last
+            t_ext = np.concatenate([[t_prev], t_chunk])
+            int_x = int_x_prev + cumulative_trapezoid(
+                np.concatenate([[x_prev], x_chunk]), t_ext)
+            theta = c*t_chunk + int_x
+            integrand = x_chunk*np.cos(theta)
+            p = p_prev + cumulative_trapezoid(
+                np.concatenate([[integrand_prev], integrand]), t_ext)
+        t_part[j:j+m] = t_chunk
+        p_part[j:j+m] = p
+        last = (t_chunk[-1], x_chunk[-1], int_x[-1], integrand[-1], p[-1])
+        w = sol_chunk[-1]
+        t = t_chunk[-1]
+        j += m
+    return t_part, p_part
+
 # -----------------------------------------------------------------------------------
 # Main: Compute p(t) for each energy and plot on a single graph
 # -----------------------------------------------------------------------------------
 if __name__ == "__main__":
+    # Plotting is only imported here, so that the workers importing this 
+    # module do not load matplotlib
+    import matplotlib.pyplot as plt
+    if "YII_1" in plt.style.available: plt.style.use("YII_1")
+
     fig, ax = plt.subplots()  # single figure and axis
 
     # Loop over energies and plot each p(t) on the same axis
     i = 0
     line_styles = ["-", "-", "--", ":", ":"]
     for E in E_all:
-        # 1) Integrate Hénon–Heiles for current energy
-        t_part, x_part, y_part, u_part, v_part = compute_coordinates(E)
-
-        # 2) Compute theta(t) for current energy
-        theta_arr = compute_theta_discrete(t_part, x_part, c=DEFAULT_c)
-
-        # 3) Compute p(t) for current energy
-        p_arr = compute_p_discrete(t_part, x_part, theta_arr)
+        # 1-3) Integrate Hénon–Heiles and compute theta(t) and p(t) for 
+        # current energy, in chunks that fit in memory
+        if PARAREAL:
+            t_part, x_part, y_part, u_part, v_part = compute_coordinates(E)
+            theta_arr = compute_theta_discrete(t_part, x_part, c=DEFAULT_c)
+            p_arr = compute_p_discrete(t_part, x_part, theta_arr)
+        else:
+            t_part, p_arr = compute_p_chunked(E)
 
         # Plot p(t) for the current energy on the same axis
         ax.plot(t_part, p_arr, 
@@ -0,0 +1,571 @@
+#!/usr/bin/env python
+"""
+High-Order Integrators
+
+High-order explicit integrators for long runs: Dormand-Prince 8(5,3) (DOP853)
+a Gauss-Radau predictor-corrector (IAS15-like) and a Bulirsch-Stoer 
+extrapolation method, all vectorized over the particles, with a fixed step or 
+an error control within each output step.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+high_order.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+from numpy.polynomial import legendre
+
+import integrator as itg
+
+DEFAULT_rtol = 1e-12
+DEFAULT_atol = 1e-14
+DEFAULT_eps_radau = 1e-9
+N_RADAU = 8
+MAX_ITER_RADAU = 12
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10
+N_BS = 6
+K_MAX_BS = 9
+
+# Dormand & Prince (1980), Hairer et al. (1993) coefficients
+DOP853_C = np.array([0.0,
+                     0.526001519587677318785587544488e-01,
+                     0.789002279381515978178381316732e-01,
+                     0.118350341907227396726757197510,
+                     0.281649658092772603273242802490,
+                     0.333333333333333333333333333333,
+                     0.25,
+                     0.307692307692307692307692307692,
+                     0.651282051282051282051282051282,
+                     0.6,
+                     0.857142857142857142857142857142,
+                     1.0,
+                     1.0])
+
+DOP853_A = np.zeros((13, 12))
+DOP853_A[1, 0] = 5.26001519587677318785587544488e-2
+
+DOP853_A[2, 0] = 1.97250569845378994544595329183e-2
+DOP853_A[2, 1] = 5.91751709536136983633785987549e-2
+
+DOP853_A[3, 0] = 2.95875854768068491816892993775e-2
+DOP853_A[3, 2] = 8.87627564304205475450678981324e-2
+
+DOP853_A[4, 0] = 2.41365134159266685502369798665e-1
+DOP853_A[4, 2] = -8.84549479328286085344864962717e-1
+DOP853_A[4, 3] = 9.24834003261792003115737966543e-1
+
+DOP853_A[5, 0] = 3.7037037037037037037037037037e-2
+DOP853_A[5, 3] = 1.70828608729473871279604482173e-1
+DOP853_A[5, 4] = 1.25467687566822425016691814123e-1
+
+DOP853_A[6, 0] = 3.7109375e-2
+DOP853_A[6, 3] = 1.70252211019544039314978060272e-1
+DOP853_A[6, 4] = 6.02165389804559606850219397283e-2
+DOP853_A[6, 5] = -1.7578125e-2
+
+DOP853_A[7, 0] = 3.70920001185047927108779319836e-2
+DOP853_A[7, 3] = 1.70383925712239993810214054705e-1
+DOP853_A[7, 4] = 1.07262030446373284651809199168e-1
+DOP853_A[7, 5] = -1.53194377486244017527936158236e-2
+DOP853_A[7, 6] = 8.27378916381402288758473766002e-3
+
+DOP853_A[8, 0] = 6.24110958716075717114429577812e-1
+DOP853_A[8, 3] = -3.36089262944694129406857109825
+DOP853_A[8, 4] = -8.68219346841726006818189891453e-1
+DOP853_A[8, 5] = 2.75920996994467083049415600797e1
+DOP853_A[8, 6] = 2.01540675504778934086186788979e1
+DOP853_A[8, 7] = -4.34898841810699588477366255144e1
+
+DOP853_A[9, 0] = 4.77662536438264365890433908527e-1
+DOP853_A[9, 3] = -2.48811461997166764192642586468
+DOP853_A[9, 4] = -5.90290826836842996371446475743e-1
+DOP853_A[9, 5] = 2.12300514481811942347288949897e1
+DOP853_A[9, 6] = 1.52792336328824235832596922938e1
+DOP853_A[9, 7] = -3.32882109689848629194453265587e1
+DOP853_A[9, 8] = -2.03312017085086261358222928593e-2
+
+DOP853_A[10, 0] = -9.3714243008598732571704021658e-1
+DOP853_A[10, 3] = 5.18637242884406370830023853209
+DOP853_A[10, 4] = 1.09143734899672957818500254654
+DOP853_A[10, 5] = -8.14978701074692612513997267357
+DOP853_A[10, 6] = -1.85200656599969598641566180701e1
+DOP853_A[10, 7] = 2.27394870993505042818970056734e1
+DOP853_A[10, 8] = 2.49360555267965238987089396762
+DOP853_A[10, 9] = -3.0467644718982195003823669022
+
+DOP853_A[11, 0] = 2.27331014751653820792359768449
+DOP853_A[11, 3] = -1.05344954667372501984066689879e1
+DOP853_A[11, 4] = -2.00087205822486249909675718444
+DOP853_A[11, 5] = -1.79589318631187989172765950534e1
+DOP853_A[11, 6] = 2.79488845294199600508499808837e1
+DOP853_A[11, 7] = -2.85899827713502369474065508674
+DOP853_A[11, 8] = -8.87285693353062954433549289258
+DOP853_A[11, 9] = 1.23605671757943030647266201528e1
+DOP853_A[11, 10] = 6.43392746015763530355970484046e-1
+
+DOP853_A[12, 0] = 5.42937341165687622380535766363e-2
+DOP853_A[12, 5] = 4.45031289275240888144113950566
+DOP853_A[12, 6] = 1.89151789931450038304281599044
+DOP853_A[12, 7] = -5.8012039600105847814672114227
+DOP853_A[12, 8] = 3.1116436695781989440891606237e-1
+DOP853_A[12, 9] = -1.52160949662516078556178806805e-1
+DOP853_A[12, 10] = 2.01365400804030348374776537501e-1
+DOP853_A[12, 11] = 4.47106157277725905176885569043e-2
+
+DOP853_B = DOP853_A[12]
+
+DOP853_E3 = DOP853_B.copy()
+DOP853_E3[0] -= 0.244094488188976377952755905512
+DOP853_E3[8] -= 0.733846688281611857341361741547
+DOP853_E3[11] -= 0.220588235294117647058823529412e-1
+
+DOP853_E5 = np.zeros(12)
+DOP853_E5[0] = 0.1312004499419488073250102996e-1
+DOP853_E5[5] = -0.1225156446376204440720569753e+1
+DOP853_E5[6] = -0.4957589496572501915214079952
+DOP853_E5[7] = 0.1664377182454986536961530415e+1
+DOP853_E5[8] = -0.3503288487499736816886487290
+DOP853_E5[9] = 0.3341791187130174790297318841
+DOP853_E5[10] = 0.8192320648511571246570742613e-1
+DOP853_E5[11] = -0.2235530786388629525884427845e-1
+
+def _stages(t: float, w: np.ndarray, h: float, func, 
+            A: np.ndarray, C: np.ndarray) -> np.ndarray:
+    """Computes the stages of an explicit Runge-Kutta method
+    @ params
+        - t: time value
+        - w: state vector [[x, y], [u, v]]
+        - h: step size (time step)
+        - func: RHS of differential equation
+        - A, C: Butcher tableau
+    @returns: 
+        - K: derivatives at each stage, of shape (stages,) + shape(w)
+    """
+    K = np.zeros((len(C),) + np.shape(w))
+    for s in range(len(C)):
+        dw = np.tensordot(A[s, :s], K[:s], axes=(0, 0)) if s > 0 else 0
+        K[s] = func(t + C[s]*h, w + h*dw)
+    return K
+
+def _error_norm(err: np.ndarray, 
+                w: np.ndarray, 
+                w_new: np.ndarray, 
+                rtol: float, 
+                atol: float) -> float:
+    """Largest (over the particles) RMS norm of the scaled local error"""
+    scale = atol + rtol*np.maximum(np.abs(w), np.abs(w_new))
+    norm = np.sqrt(np.mean((err/scale)**2, axis=(0, 1)))
+    return np.max(norm)
+
+def _dop853_error_norm(err5: np.ndarray, 
+                       err3: np.ndarray, 
+                       w: np.ndarray, 
+                       w_new: np.ndarray, 
+                       rtol: float, 
+                       atol: float) -> float:
+    """Largest (over the particles) scaled local error of DOP853, combining
+    the 5th and 3rd order estimators as err5²/sqrt(err5² + 0.01 err3²) 
+    (Hairer et al. 1993)"""
+    scale = atol + rtol*np.maximum(np.abs(w), np.abs(w_new))
+    err5_2 = np.sum((err5/scale)**2, axis=(0, 1))
+    err3_2 = np.sum((err3/scale)**2, axis=(0, 1))
+    denom = err5_2 + 0.01*err3_2
+    N = np.shape(w)[0]*np.shape(w)[1]
+    norm = err5_2/np.sqrt(N*np.where(denom > 0, denom, 1))
+    return np.max(norm)
+
+def dop853_step(t: float, w: np.ndarray, h: float, func, 
+                error: bool = False):
+    """One step of the DOP853 method (see integrator.euler_step)
+    @ params
+        - error: if True, also returns the 5th and 3rd order local error 
+          estimates
+    """
+    K = _stages(t, w, h, func, DOP853_A[:12], DOP853_C[:12])
+    w_new = w + h*np.tensordot(DOP853_B, K, axes=(0, 0))
+    if not error:
+        return w_new
+    err5 = h*np.tensordot(DOP853_E5, K, axes=(0, 0))
+    err3 = h*np.tensordot(DOP853_E3, K, axes=(0, 0))
+    return w_new, err5, err3
+
+def dop853(t0: float, 
+           W0: np.ndarray, 
+           h: float, 
+           n: int, 
+           func,
+           rtol: float = None,
+           atol: float = DEFAULT_atol,
+           stride: int = 1,
+           t_out: np.ndarray = None):
+    """DOP853 method adapted for state vector [[x, y], [u, v]]
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]]
+        - h: step size (time step)
+        - n: number of steps
+        - func: RHS of differential equation
+        - rtol: relative tolerance; if given, each step h is done with 
+          adaptive substeps (shared by all the particles), otherwise with a 
+          single step
+        - atol: absolute tolerance
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps), instead of
+          stride
+    @returns: 
+        - t, W: time and state (solution) arrays
+    """
+    steps = itg.output_steps(t0, h, n, stride, t_out)
+    time = np.zeros(len(steps))
+    W = np.zeros((len(steps),) + np.shape(W0))
+    j = 0
+
+    t = t0
+    w = W0
+    h_sub = h
+    for i in range(n):
+        t_end = t0 + (i + 1)*h
+        if rtol is None:
+            w = dop853_step(t, w, h, func)
+        else:
+            while t_end - t > 1e-12*h:
+                h_try = min(h_sub, t_end - t)
+                w_new, err5, err3 = dop853_step(t, w, h_try, func, 
+                                                error=True)
+                err = _dop853_error_norm(err5, err3, w, w_new, rtol, atol)
+                factor = MAX_FACTOR if err == 0 \
+                        else SAFETY*err**(-1/8)
+                factor = min(MAX_FACTOR, max(MIN_FACTOR, factor))
+                if err <= 1:
+                    t = t + h_try
+                    w = w_new
+                    # A substep shortened to end on t_end does not reduce
+                    # the next one
+                    h_sub = max(h_sub, h_try*factor) if factor > 1 \
+                            else h_try*factor
+                else:
+                    h_sub = h_try*factor
+        t = t_end
+
+        if j < len(steps) and i + 1 == steps[j]:
+            time[j] = t
+            W[j] = w
+            j += 1
+            if j == len(steps):
+                break
+    return time, W
+
+def radau_nodes(N: int = N_RADAU) -> tuple:
+    """Gauss-Radau quadrature nodes on [0, 1] (including 0), and the 
+    collocation matrix of the polynomial through these nodes
+    @ params
+        - N: number of nodes
+    @returns: 
+        - c: nodes
+        - A: A[i, j] = integral from 0 to c[i] of the jth Lagrange polynomial
+        - b: quadrature weights (integral from 0 to 1)
+    """
+    coef = np.zeros(N + 1)
+    coef[N-1:] = 1
+    x = np.sort(legendre.legroots(coef))
+    x[0] = -1
+    # Lagrange polynomials in the Legendre basis of [-1, 1] (x = 2c - 1), 
+    # which is better conditioned than the monomials: V @ L = I
+    L = np.linalg.inv(legendre.legvander(x, N - 1))
+    L_int = legendre.legint(L, lbnd=-1)/2
+    A = legendre.legvander(x, N) @ L_int
+    b = legendre.legvander(np.array([1.]), N)[0] @ L_int
+    return (x + 1)/2, A, b
+
+RADAU_C, RADAU_A, RADAU_B = radau_nodes()
+# Lagrange polynomials of the nodes, in the Legendre basis
+RADAU_L = np.linalg.inv(legendre.legvander(2*RADAU_C - 1, N_RADAU - 1))
+
+def gauss_radau_step(t: float, w: np.ndarray, h: float, func,
+                     K: np.ndarray = None,
+                     error: bool = False):
+    """One step of the Gauss-Radau predictor-corrector method: collocation 
+    at the 8 Gauss-Radau nodes (order 15), the derivatives at the nodes being
+    predicted (from K) then corrected by fixed-point iterations.
+    @ params
+        - t: time value
+        - w: state vector [[x, y], [u, v]]
+        - h: step size (time step)
+        - func: RHS of differential equation
+        - K: predicted derivatives at the nodes (constant if None)
+        - error: if True, also returns the derivatives at the nodes and the 
+          relative size of the last term of their polynomial (IAS15 error)
+    @returns: 
+        - w_new (, K, err): state vector at t + h
+    """
+    if K is None:
+        K = np.repeat(func(t, w)[np.newaxis], len(RADAU_C), axis=0)
+    else:
+        K = np.array(K)
+        K[0] = func(t, w)
+    for i in range(MAX_ITER_RADAU):
+        K_old = K
+        K = np.array(K)
+        for s in range(1, len(RADAU_C)):
+            K[s] = func(t + RADAU_C[s]*h, 
+                        w + h*np.tensordot(RADAU_A[s], K_old, axes=(0, 0)))
+        change = np.max(np.abs(K - K_old)) / max(np.max(np.abs(K)), 1e-300)
+        if change < 1e-16:
+            break
+    w_new = w + h*np.tensordot(RADAU_B, K, axes=(0, 0))
+    if not error:
+        return w_new
+    last = np.tensordot(RADAU_L[-1], K, axes=(0, 0))
+    err = np.max(np.abs(last)) / max(np.max(np.abs(K)), 1e-300)
+    return w_new, K, err
+
+def _radau_predict(K: np.ndarray, ratio: float) -> np.ndarray:
+    """Predicts the derivatives at the nodes of the next step, from the 
+    polynomial through the derivatives K of the previous step
+    @ params
+        - K: derivatives at the nodes of the previous step
+        - ratio: next step size over previous step size
+    @returns: 
+        - K: predicted derivatives
+    """
+    tau = 1 + RADAU_C*ratio
+    values = legendre.legvander(2*tau - 1, N_RADAU - 1) @ RADAU_L
+    return np.tensordot(values, K, axes=(1, 0))
+
+def gauss_radau(t0: float, 
+                W0: np.ndarray, 
+                h: float, 
+                n: int, 
+                func,
+                eps: float = None,
+                stride: int = 1,
+                t_out: np.ndarray = None):
+    """Gauss-Radau predictor-corrector method (IAS15-like) adapted for state 
+    vector [[x, y], [u, v]]
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]]
+        - h: step size (time step)
+        - n: number of steps
+        - func: RHS of differential equation
+        - eps: precision parameter (IAS15's epsilon, e.g. 1e-9); if given,
+          each step h is done with adaptive substeps (shared by all the 
+          particles), otherwise with a single step
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps), instead of
+          stride
+    @returns: 
+        - t, W: time and state (solution) arrays
+    """
+    steps = itg.output_steps(t0, h, n, stride, t_out)
+    time = np.zeros(len(steps))
+    W = np.zeros((len(steps),) + np.shape(W0))
+    j = 0
+
+    t = t0
+    w = W0
+    K = None
+    h_prev = h
+    h_sub = h
+    for i in range(n):
+        t_end = t0 + (i + 1)*h
+        if eps is None:
+            if K is not None:
+                K = _radau_predict(K, 1)
+            w, K, err = gauss_radau_step(t, w, h, func, K, error=True)
+        else:
+            while t_end - t > 1e-12*h:
+                h_try = min(h_sub, t_end - t)
+                K_try = None if K is None else _radau_predict(K, 
+                                                              h_try/h_prev)
+                w_new, K_new, err = gauss_radau_step(t, w, h_try, func, 
+                                                     K_try, error=True)
+                factor = MAX_FACTOR if err == 0 \
+                        else (eps/err)**(1/7)
+                factor = min(MAX_FACTOR, max(MIN_FACTOR, factor))
+                if factor >= SAFETY**2 or h_try*factor < 1e-12*h:
+                    t = t + h_try
+                    w = w_new
+                    K = K_new
+                    h_prev = h_try
+                    h_sub = max(h_sub, h_try*factor) if factor > 1 \
+                            else h_try*factor
+                else:
+                    h_sub = h_try*factor
+        t = t_end
+
+        if j < len(steps) and i + 1 == steps[j]:
+            time[j] = t
+            W[j] = w
+            j += 1
+            if j == len(steps):
+                break
+    return time, W
+
+def bs_sequence(K: int = K_MAX_BS) -> np.ndarray:
+    """Step number sequence of the extrapolation (Deuflhard: 2, 4, 6, ...)"""
+    return 2*np.arange(1, K + 1)
+
+BS_N = bs_sequence()
+BS_WORK = 1 + np.cumsum(BS_N) # evaluations of func up to each row
+
+def modified_midpoint(t: float, w: np.ndarray, h: float, n: int, func, 
+                      f0: np.ndarray = None) -> np.ndarray:
+    """Modified midpoint rule (Gragg): n substeps over a step h
+    @ params
+        - f0: func(t, w) if already known
+    """
+    dh = h/n
+    if f0 is None:
+        f0 = func(t, w)
+    w_prev = w
+    w_cur = w + dh*f0
+    for j in range(1, n):
+        w_prev, w_cur = w_cur, w_prev + 2*dh*func(t + j*dh, w_cur)
+    return (w_cur + w_prev + dh*func(t + h, w_cur))/2
+
+def _bs_row(T: list, t: float, w: np.ndarray, h: float, func, 
+            f0: np.ndarray) -> np.ndarray:
+    """Adds a row to the extrapolation tableau T (Aitken-Neville in h^2) 
+    and returns the difference of its last two entries"""
+    j = len(T)
+    row = [modified_midpoint(t, w, h, BS_N[j], func, f0)]
+    for l in range(1, j + 1):
+        ratio = (BS_N[j]/BS_N[j-l])**2 - 1
+        row.append(row[l-1] + (row[l-1] - T[j-1][l-1])/ratio)
+    T.append(row)
+    return row[-1] - row[-2] if j > 0 else None
+
+def bulirsch_stoer_step(t: float, w: np.ndarray, h: float, func, 
+                        k: int = N_BS, error: bool = False):
+    """One step of the Bulirsch-Stoer method with k rows of extrapolation 
+    (order 2k) (see integrator.euler_step)
+    @ params
+        - k: number of rows of the tableau
+        - error: if True, also returns the local error estimate
+    """
+    T = []
+    f0 = func(t, w)
+    for j in range(k):
+        err = _bs_row(T, t, w, h, func, f0)
+    if error:
+        return T[-1][-1], err
+    return T[-1][-1]
+
+def bulirsch_stoer(t0: float, 
+                   W0: np.ndarray, 
+                   h: float, 
+                   n: int, 
+                   func,
+                   rtol: float = None,
+                   atol: float = DEFAULT_atol,
+                   k: int = N_BS,
+                   stride: int = 1,
+                   t_out: np.ndarray = None):
+    """Bulirsch-Stoer (modified midpoint and Richardson extrapolation) 
+    method adapted for state vector [[x, y], [u, v]]
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]]
+        - h: step size (time step)
+        - n: number of steps
+        - func: RHS of differential equation
+        - rtol: relative tolerance; if given, each step h is done with 
+          adaptive substeps and orders (shared by all the particles), 
+          otherwise with a single step of k rows
+        - atol: absolute tolerance
+        - k: number of rows of the tableau (initial guess if rtol is given)
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps), instead of
+          stride
+    @returns: 
+        - t, W: time and state (solution) arrays
+    """
+    steps = itg.output_steps(t0, h, n, stride, t_out)
+    time = np.zeros(len(steps))
+    W = np.zeros((len(steps),) + np.shape(W0))
+    j = 0
+
+    t = t0
+    w = W0
+    h_sub = h
+    k = min(max(k, 3), K_MAX_BS - 1)
+    for i in range(n):
+        t_end = t0 + (i + 1)*h
+        if rtol is None:
+            w = bulirsch_stoer_step(t, w, h, func, k)
+        else:
+            while t_end - t > 1e-12*h:
+                h_try = min(h_sub, t_end - t)
+                T = []
+                f0 = func(t, w)
+                h_opt = np.zeros(K_MAX_BS)
+                accepted = False
+                # The convergence is checked in the rows k - 1, k and k + 1 
+                # (Hairer et al. 1993, simplified), within the table
+                for row in range(min(k + 2, K_MAX_BS)):
+                    err = _bs_row(T, t, w, h_try, func, f0)
+                    if row == 0:
+                        continue
+                    err = _error_norm(err, w, T[row][-1], rtol, atol)
+                    factor = MAX_FACTOR if err == 0 \
+                            else SAFETY*err**(-1/(2*row + 1))
+                    h_opt[row] = h_try*min(MAX_FACTOR, 
+                                           max(MIN_FACTOR, factor))
+                    if row >= k - 1 and err <= 1:
+                        accepted = True
+                        break
+                if not accepted:
+                    # Rejected: smaller step (err > 1 in the last row)
+                    h_sub = min(h_opt[row], SAFETY*h_try)
+                    continue
+                t = t + h_try
+                w = T[row][-1]
+                # Order with the smallest work per unit step
+                work = BS_WORK[row-1:row+1]/h_opt[row-1:row+1]
+                k = row if work[1] < 0.9*work[0] else row - 1
+                h_new = h_opt[k]
+                if k == row and row < K_MAX_BS - 1 \
+                        and work[1] < 0.9*work[0]:
+                    h_new = h_opt[row]*BS_WORK[row+1]/BS_WORK[row]
+                    k = row + 1
+                k = min(max(k, 3), K_MAX_BS - 1)
+                h_sub = max(h_sub, h_new) if h_try < h_sub else h_new
+        t = t_end
+
+        if j < len(steps) and i + 1 == steps[j]:
+            time[j] = t
+            W[j] = w
+            j += 1
+            if j == len(steps):
+                break
+    return time, W
+
+itg.STEPS[dop853] = dop853_step
+itg.STEPS[gauss_radau] = gauss_radau_step
+itg.STEPS[bulirsch_stoer] = bulirsch_stoer_step
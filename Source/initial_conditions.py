@@ -32,13 +32,16 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see https://www.gnu.org/licenses/.
 """
 
+from functools import lru_cache
+
 import numpy as np
-import matplotlib.pyplot as plt
 POS_MIN = -1
 POS_MAX = +1
 VEL_MIN = -1
 VEL_MAX = +1
 N_PART = 1
+N_THETA = 512
+R_MAX = 1
 
 def mesh_grid(N: int = N_PART,
               xmin: float = POS_MIN, 
@@ -125,14 +128,204 @@ def n_energy_part(potential,
     V = C*np.sin(THETA)
     return np.array([[X, Y], [U, V]])
 
+def ray_crossing(potential,
+                 E: float,
+                 cos: np.ndarray,
+                 sin: np.ndarray,
+                 r_max: float = R_MAX) -> np.ndarray:
+    """Finds the first radius where the potential reaches E along rays from
+    the origin (r_max if it does not before r_max).
+    @ params:
+        - potential: gravitational potential
+        - E: total energy
+        - cos, sin: direction of the rays
+        - r_max: maximum radius
+    @ returns:
+        - r: radius of the zero-velocity curve along each ray
+    """
+    cos = np.atleast_1d(cos)
+    sin = np.atleast_1d(sin)
+    # First crossing along each ray on a coarse grid, then bisection
+    R_grid = np.linspace(0, r_max, 257)
+    w = np.array([np.outer(cos, R_grid), np.outer(sin, R_grid)])
+    outside = potential(w, position_only=True) > E
+    first = np.where(np.any(outside, axis=1), np.argmax(outside, axis=1), -1)
+    r_low = np.where(first > 0, R_grid[first - 1], r_max)
+    r_high = np.where(first > 0, R_grid[first], r_max)
+    for i in range(50):
+        r_mid = (r_low + r_high)/2
+        w = np.array([r_mid*cos, r_mid*sin])
+        out = potential(w, position_only=True) > E
+        r_high = np.where(out, r_mid, r_high)
+        r_low = np.where(out, r_low, r_mid)
+    return r_high
+
+def halton(N: int, base: int, start: int = 1) -> np.ndarray:
+    """Halton low-discrepancy sequence (radical inverse of the integers)
+    @ params:
+        - N: number of points
+        - base: base of the sequence (a prime number)
+        - start: index of the first point
+    @ returns:
+        - sequence of N numbers in [0, 1)
+    """
+    i = np.arange(start, start + N)
+    seq = np.zeros(N)
+    f = 1.
+    while np.any(i > 0):
+        f = f/base
+        seq = seq + f*(i % base)
+        i = i // base
+    return seq
+
+@lru_cache(maxsize=64)
+def zero_velocity_curve(potential,
+                        E: float = 0,
+                        N_theta: int = N_THETA,
+                        r_max: float = R_MAX) -> tuple:
+    """Tabulates the zero-velocity curve V(x, y) = E around the origin, in 
+    polar coordinates, and the sampling tables of the enclosed region 
+    (cached for each energy, the arrays are read-only).
+    @ params:
+        - potential: gravitational potential
+        - E: total energy
+        - N_theta: number of angular bins
+        - r_max: maximum radius (the region is open for E >= 1/6 in the 
+          Hénon-Heiles potential)
+    @ returns:
+        - theta: edges of the angular bins
+        - r_bin: radius of the circular sector bounding the region in each bin
+        - cdf: cumulative distribution of the area of the sectors
+    """
+    # Edges and centres of the bins, the curve is bounded with all of them
+    theta = np.linspace(0, 2*np.pi, 2*N_theta + 1)
+    cos = np.cos(theta)
+    sin = np.sin(theta)
+    r_high = ray_crossing(potential, E, cos, sin, r_max)
+    r_bin = np.max([r_high[0:-1:2], r_high[1::2], r_high[2::2]], axis=0)
+    r_bin = np.minimum(r_bin*(1 + 1e-3), r_max)
+    cdf = np.cumsum(r_bin**2)
+    cdf = np.concatenate([[0], cdf/cdf[-1]])
+    theta = theta[::2]
+    # The cached arrays are shared by all the callers
+    for array in (theta, r_bin, cdf):
+        array.setflags(write=False)
+    return theta, r_bin, cdf
+
+def n_energy_part_zvc(potential,
+                      N: int = N_PART,
+                      E: float = 0,
+                      N_theta: int = N_THETA,
+                      r_max: float = R_MAX):
+    """Generates N particles with an energy E in a potential, uniformly in 
+    the region enclosed by the zero-velocity curve (see zero_velocity_curve).
+    Nearly all the drawn positions are accepted, whatever the energy.
+    @ params:
+        - potential: gravitational potential
+        - N: number of particles
+        - E: total energy
+        - N_theta: number of angular bins of the tables
+        - r_max: maximum radius
+    @ returns:
+        - W: an array of all the positions and velocities.
+    """
+    theta, r_bin, cdf = zero_velocity_curve(potential, E, N_theta, r_max)
+    X = np.zeros(0)
+    Y = np.zeros(0)
+    POT = np.zeros(0)
+    while len(X) < N:
+        n = int((N - len(X))*1.05) + 16
+        # Uniform in the bounding sectors: bin from the area, then uniform 
+        # angle in the bin and r with a sqrt(uniform) distribution
+        k = np.searchsorted(cdf, np.random.random(n), side="right") - 1
+        k = np.minimum(k, len(r_bin) - 1)
+        t = theta[k] + np.random.random(n)*(theta[k+1] - theta[k])
+        r = r_bin[k]*np.sqrt(np.random.random(n))
+        x = r*np.cos(t)
+        y = r*np.sin(t)
+        pot = potential(np.array([x, y]), position_only=True)
+        valid = pot <= E
+        X = np.concatenate([X, x[valid]])
+        Y = np.concatenate([Y, y[valid]])
+        POT = np.concatenate([POT, pot[valid]])
+    X = X[:N]
+    Y = Y[:N]
+    POT = POT[:N]
+    C = np.sqrt(2 * (E - POT))
+    THETA = np.random.random(N)*2*np.pi
+    U = C*np.cos(THETA)
+    V = C*np.sin(THETA)
+    return np.array([[X, Y], [U, V]])
+
+def section_part(potential,
+                 N: int = N_PART,
+                 E: float = 0,
+                 grid: str = "halton",
+                 r_max: float = R_MAX):
+    """Generates particles with an energy E directly on the Poincaré section
+    x = 0, from a grid in (y, v) covering the allowed region of the section;
+    u > 0 is then given by the energy.
+    @ params:
+        - potential: gravitational potential
+        - N: number of particles
+        - E: total energy
+        - grid: "halton" (quasi-random, exactly N particles) or "regular" 
+          (square grid, about N particles)
+        - r_max: maximum radius
+    @ returns:
+        - W: an array of all the positions and velocities.
+    """
+    y_max = ray_crossing(potential, E, 0, 1, r_max)[0]
+    y_min = -ray_crossing(potential, E, 0, -1, r_max)[0]
+    # Allowed region: v^2 <= 2(E - V(0, y)), for y_min <= y <= y_max
+    y_grid = np.linspace(y_min, y_max, 1025)
+    v_grid = np.sqrt(np.maximum(2*(E - potential(
+        np.array([np.zeros_like(y_grid), y_grid]), position_only=True)), 0))
+    v_max = np.max(v_grid)
+    if grid == "regular":
+        area = np.trapezoid(2*v_grid, y_grid)
+        d = np.sqrt(area/N)
+        Y = np.arange(y_min + d/2, y_max, d)
+        V = np.arange(-v_max + d/2, v_max, d)
+        Y, V = np.meshgrid(Y, V, indexing="ij")
+        Y = Y.flatten()
+        V = V.flatten()
+        POT = potential(np.array([np.zeros_like(Y), Y]), position_only=True)
+        valid = V**2 < 2*(E - POT)
+        Y = Y[valid]
+        V = V[valid]
+        POT = POT[valid]
+    elif grid == "halton":
+        Y = np.zeros(0)
+        V = np.zeros(0)
+        POT = np.zeros(0)
+        start = 1
+        while len(Y) < N:
+            n = 2*(N - len(Y)) + 16
+            y = y_min + halton(n, 2, start)*(y_max - y_min)
+            v = -v_max + halton(n, 3, start)*2*v_max
+            start += n
+            pot = potential(np.array([np.zeros_like(y), y]), 
+                            position_only=True)
+            valid = v**2 < 2*(E - pot)
+            Y = np.concatenate([Y, y[valid]])
+            V = np.concatenate([V, v[valid]])
+            POT = np.concatenate([POT, pot[valid]])
+        Y = Y[:N]
+        V = V[:N]
+        POT = POT[:N]
+    else:
+        raise ValueError("Unknown grid '{}'".format(grid))
+    X = np.zeros_like(Y)
+    U = np.sqrt(2*(E - POT) - V**2)
+    return np.array([[X, Y], [U, V]])
+
 def n_energy_2part(potential,
                    N: int = N_PART,
                    E: float = 0,
                    sep: float = 1e-7,
-                   xmin: float = -1,
-                   xmax: float = +1,
-                   ymin: float = -0.5,
-                   ymax: float = +1):
+                   sampler = n_energy_part,
+                   **options):
     """Generate a sample of 2N particles with the energy E in a potential in 
     two sets: one "normal" set (see n_energy_part), and a slightly shifted set
     with a separation sep.
@@ -141,15 +334,15 @@ def n_energy_2part(potential,
         - N: number of particles
         - E: total energy
         - sep: the separation between the two sets
-        - xmin: minimum value for position x
-        - xmax: maximum value for position x
-        - ymin: minimum value for position y
-        - ymax: maximum value for position y
+        - sampler: generator of the first set (n_energy_part or 
+          n_energy_part_zvc)
+        - options: options of the sampler (e.g. the bounds xmin, xmax, ymin,
+          ymax of n_energy_part)
     @ returns:
         - (W1, W2): the two arrays of all the positions and velocities for 
         each set.
     """
-    W_1 = n_energy_part(potential, N, E)
+    W_1 = sampler(potential, N, E, **options)
     W_2 = np.zeros_like(W_1)
     alpha = np.random.uniform(0, 2*np.pi, N)
     W_2[0, 0] = W_1[0, 0] + sep*np.cos(alpha)
@@ -34,11 +34,60 @@ along with this program. If not, see https://www.gnu.org/licenses/.
 """
 import numpy as np
 
+def euler_step(t: float, w: np.ndarray, h: float, func) -> np.ndarray:
+    """One step of the Euler method
+    @ params
+        - t: time value
+        - w: state vector [[x, y], [u, v]]
+        - h: step size (time step)
+        - func: RHS of differential equation
+    @returns: 
+        - w: state vector at t + h
+    """
+    return w + h*func(t, w)
+
+def rk2_step(t: float, w: np.ndarray, h: float, func) -> np.ndarray:
+    """One step of the RK2 method (see euler_step)"""
+    k1 = func(t, w)
+    k2 = func(t + h/2, w + h/2*k1)
+    return w + h*k2
+
+def rk4_step(t: float, w: np.ndarray, h: float, func) -> np.ndarray:
+    """One step of the RK4 method (see euler_step)"""
+    k1 = func(t, w)
+    k2 = func(t + h/2, w + h/2*k1)
+    k3 = func(t + h/2, w + h/2*k2)
+    k4 = func(t + h, w + h*k3)
+    return w + h*(k1/6 + k2/3 + k3/3 + k4/6)
+
+def output_steps(t0: float, 
+                 h: float, 
+                 n: int, 
+                 stride: int = 1, 
+                 t_out: np.ndarray = None) -> np.ndarray:
+    """Steps (from 1 to n) whose state is saved by the integrators
+    @ params
+        - t0: initial time value
+        - h: step size (time step)
+        - n: number of steps
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps are used), 
+          instead of stride
+    @returns: 
+        - steps: increasing step numbers
+    """
+    if t_out is None:
+        return np.arange(stride, n + 1, stride)
+    steps = np.round((np.asarray(t_out) - t0)/h).astype(int)
+    return np.unique(np.clip(steps, 1, n))
+
 def euler(t0: float, 
           W0: np.ndarray, 
           h: float, 
           n: int, 
-          func):
+          func,
+          stride: int = 1,
+          t_out: np.ndarray = None):
     """Euler method adapted for state vector [[x, y], [u, v]]
     @ params
         - t0: initial time value
@@ -46,11 +95,16 @@ def euler(t0: float,
         - h: step size (time step)
         - n: number of steps
         - func: RHS of differential equation
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps), instead of
+          stride
     @returns: 
         - t, W: time and state (solution) arrays
     """
-    time = np.zeros(n)
-    W = np.zeros((n,) + np.shape(W0))
+    steps = output_steps(t0, h, n, stride, t_out)
+    time = np.zeros(len(steps))
+    W = np.zeros((len(steps),) + np.shape(W0))
+    j = 0
 
     t = t0
     w = W0
@@ -59,15 +113,21 @@ def euler(t0: float,
         w = w + h*k1
         t = t + h
 
-        time[i] = t
-        W[i] = w
+        if j < len(steps) and i + 1 == steps[j]:
+            time[j] = t
+            W[j] = w
+            j += 1
+            if j == len(steps):
+                break
     return time, W
 
 def rk2(t0: float, 
         W0: np.ndarray, 
         h: float, 
         n: int, 
-        func):
+        func,
+        stride: int = 1,
+        t_out: np.ndarray = None):
     """RK2 method adapted for state vector [[x, y], [u, v]]
     @ params
         - t0: initial time value
@@ -75,11 +135,16 @@ def rk2(t0: float,
         - h: step size (time step)
         - n: number of steps
         - func: RHS of differential equation
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps), instead of
+          stride
     @returns: 
         - t, W: time and state (solution) arrays
     """
-    time = np.zeros(n)
-    W = np.zeros((n,) + np.shape(W0))
+    steps = output_steps(t0, h, n, stride, t_out)
+    time = np.zeros(len(steps))
+    W = np.zeros((len(steps),) + np.shape(W0))
+    j = 0
 
     t = t0
     w = W0
@@ -90,15 +155,21 @@ def rk2(t0: float,
         w = w + h*k2
         t = t + h
 
-        time[i] = t
-        W[i] = w
+        if j < len(steps) and i + 1 == steps[j]:
+            time[j] = t
+            W[j] = w
+            j += 1
+            if j == len(steps):
+                break
     return time, W
 
 def rk4(t0: float, 
         W0: np.ndarray, 
         h: float, 
         n: int, 
-        func):
+        func,
+        stride: int = 1,
+        t_out: np.ndarray = None):
     """RK4 method adapted for state vector [[x, y], [u, v]]
     @ params
         - t0: initial time
@@ -106,11 +177,16 @@ def rk4(t0: float,
         - h: step size (time step)
         - n: number of steps
         - func: RHS of differential equation
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps), instead of
+          stride
     @returns: 
         - t, W: time and state (solution) arrays
     """
-    time = np.zeros(n)
-    W = np.zeros((n,) + np.shape(W0))
+    steps = output_steps(t0, h, n, stride, t_out)
+    time = np.zeros(len(steps))
+    W = np.zeros((len(steps),) + np.shape(W0))
+    j = 0
     # to accommodate the state vector
     t = t0
     w = W0
@@ -123,12 +199,20 @@ def rk4(t0: float,
         w = w + h*(k1/6 + k2/3 + k3/3 + k4/6)
         t = t + h
 
-        time[i] = t
-        W[i] = w
+        if j < len(steps) and i + 1 == steps[j]:
+            time[j] = t
+            W[j] = w
+            j += 1
+            if j == len(steps):
+                break
     return time, W
 
-def integrator_type(t0, W0, h, n, func, integrator):
-    return integrator(t0, W0, h, n, func)
+def integrator_type(t0, W0, h, n, func, integrator, **options):
+    return integrator(t0, W0, h, n, func, **options)
+
+STEPS = {euler: euler_step, 
+         rk2: rk2_step, 
+         rk4: rk4_step}
 
 def kepler_analytical(t0: float, 
                       W0: np.ndarray, 
@@ -163,3 +247,93 @@ def kepler_analytical(t0: float,
     W = np.swapaxes(W, 0, 2)
     W = np.swapaxes(W, 1, 2)
     return time, W
+
+def solve_kepler(M: np.ndarray, 
+                 e: np.ndarray, 
+                 tol: float = 1e-15, 
+                 max_iter: int = 50) -> np.ndarray:
+    """Solves Kepler's equation E - e sin(E) = M with Halley's method, for 
+    arrays of mean anomalies and eccentricities (broadcast together)
+    @ params
+        - M: mean anomalies
+        - e: eccentricities (0 <= e < 1)
+        - tol: tolerance on the eccentric anomaly
+        - max_iter: maximum number of iterations
+    @returns: 
+        - E: eccentric anomalies (same branch as M)
+    """
+    M = np.asarray(M, dtype=float)
+    e = np.asarray(e, dtype=float)
+    # Reduce M to [-pi, pi) and start from a guess that is good for all e
+    k = np.floor((M + np.pi)/(2*np.pi))
+    M_red = M - 2*np.pi*k
+    E = M_red + 0.85*e*np.sign(np.sin(M_red))
+    for i in range(max_iter):
+        sin_E = np.sin(E)
+        cos_E = np.cos(E)
+        F = E - e*sin_E - M_red
+        DF = 1 - e*cos_E
+        DDF = e*sin_E
+        dE = F/DF
+        dE = dE/(1 - dE*DDF/(2*DF))
+        E = E - dE
+        if np.max(np.abs(dE), initial=0) < tol:
+            break
+    return E + 2*np.pi*k
+
+def kepler_eccentric(t0: float, 
+                     W0: np.ndarray, 
+                     h: float, 
+                     n: int):
+    """Computes the analytical evolution of bound Kepler orbits of any 
+    eccentricity, for one or many particles at once, with the f and g 
+    functions of the eccentric anomaly (Kepler's equation being solved for 
+    all time samples and particles together).
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]]
+        - h: step size (time step)
+        - n: number of steps
+    @returns: 
+        - t, W: time and state (solution) arrays, sampled at the same times 
+          as the integrators (t0 + h, ..., t0 + n*h)
+    """
+    X0 = W0[0, 0]
+    Y0 = W0[0, 1]
+    U0 = W0[1, 0]
+    V0 = W0[1, 1]
+
+    time = t0 + h*np.arange(1, n+1)
+
+    R0 = np.sqrt(X0**2 + Y0**2)
+    ENERGY = (U0**2 + V0**2)/2 - 1/R0
+    if np.any(ENERGY >= 0):
+        raise ValueError("kepler_eccentric only handles bound orbits (E < 0)")
+    A = -1/(2*ENERGY)
+    SIGMA0 = (X0*U0 + Y0*V0)
+    # e cos(E0) and e sin(E0), E0 being the initial eccentric anomaly
+    E_COS = 1 - R0/A
+    E_SIN = SIGMA0/np.sqrt(A)
+    ECC = np.sqrt(E_COS**2 + E_SIN**2)
+    ANOMALY0 = np.arctan2(E_SIN, E_COS)
+    MEAN0 = ANOMALY0 - E_SIN
+    N_MEAN = A**(-3/2)
+
+    DT = np.reshape(time - t0, (n,) + (1,)*np.ndim(X0))
+    ANOMALY = solve_kepler(MEAN0 + N_MEAN*DT, ECC)
+    D_ANOMALY = ANOMALY - ANOMALY0
+    SIN_D = np.sin(D_ANOMALY)
+    COS_D = 1 - np.cos(D_ANOMALY)
+
+    R = A - (R0 - A)*(COS_D - 1) + SIGMA0*np.sqrt(A)*SIN_D
+    F = 1 - A/R0*COS_D
+    G = A*SIGMA0*COS_D + R0*np.sqrt(A)*SIN_D
+    DF = -np.sqrt(A)/(R*R0)*SIN_D
+    DG = 1 - A/R*COS_D
+
+    W = np.zeros((n,) + np.shape(W0))
+    W[:, 0, 0] = F*X0 + G*U0
+    W[:, 0, 1] = F*Y0 + G*V0
+    W[:, 1, 0] = DF*X0 + DG*U0
+    W[:, 1, 1] = DF*Y0 + DG*V0
+    return time, W
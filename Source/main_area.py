@@ -34,13 +34,14 @@ along with this program. If not, see https://www.gnu.org/licenses/.
 
 """
 import numpy as np
-from scipy.optimize import curve_fit
 
 import potentials as pot
 import energies as ene
 import integrator as itg
 import initial_conditions as init
 import poincare_sections as pcs
+import telemetry as tm
+import planner as pln
 
 OUT_DIR = "./Output/"
 FILENAME_PREFIX = "phase_separation_"
@@ -48,46 +49,286 @@ EXTENSION = ".csv"
 DEFAULT_N_iter = int(1e5)
 DEFAULT_N_part = 200
 DEFAULT_h = 0.005
+DEFAULT_N_check = 1000
+DEFAULT_mu_c = 1e-4
+DEFAULT_safety = 100
+DEFAULT_t_min = 0.2
+N_LAST = 25
+CLASS_PREFIX = "phase_class_"
+EARLY_STOP = False # retire the pairs once classified (mu is then not the 
+                   # one at the end of the run, see compute_mu_early)
+DEFAULT_N_iter_coverage = 40000
+DEFAULT_h_coverage = 0.05
+DEFAULT_N_chunk = 1000
 E_all = np.linspace(1/100, 1/6, 20)
 
 def compute_mu(E: float,
                N_iter: int = DEFAULT_N_iter,
                N_part: int = DEFAULT_N_part,
-               h: float = DEFAULT_h) -> tuple:
+               h: float = DEFAULT_h,
+               budget: int = None) -> tuple:
     """
     Computes the phase-space squared distances for particles of given energy E.
+    The integration is split in particle and time chunks that fit in the 
+    memory budget (see pln.plan).
     @params:
         - E: the total energy of each particles
         - N_iter: the number of iteration
         - N_part: the number of particles
         - h: integration steps
+        - budget: memory budget (bytes), from the available memory if None
     @returns:
         - mu: phase-space squared distance
     """
-    W_1, W_2 = init.n_energy_2part(pot.hh_potential, N_part, E)
-    t_1, positions_1 = itg.rk4(0, W_1, h, N_iter, pot.hh_evolution)
-    x_1 = positions_1[:, 0, 0]
-    y_1 = positions_1[:, 0, 1]
-    u_1 = positions_1[:, 1, 0]
-    v_1 = positions_1[:, 1, 1]
-    
-    t_2, positions_2 = itg.rk4(0, W_2, h, N_iter, pot.hh_evolution)
-    x_2 = positions_2[:, 0, 0]
-    y_2 = positions_2[:, 0, 1]
-    u_2 = positions_2[:, 1, 0]
-    v_2 = positions_2[:, 1, 1]
-    dist_sq = (x_2[-25:] - x_1[-25:])**2 \
-            + (y_2[-25:] - y_1[-25:])**2 \
-            + (u_2[-25:] - u_1[-25:])**2 \
-            + (v_2[-25:] - v_1[-25:])**2
-    
-    mu = np.sum(dist_sq, axis=0)
+    W_1, W_2 = init.n_energy_2part(pot.hh_potential, N_part, E,
+                                   sampler=init.n_energy_part_zvc)
+    N_chunk, n_chunk = pln.plan("mu", N_iter, N_part, budget)
+    mu = np.zeros(N_part)
+    for start in range(0, N_part, N_chunk):
+        part = slice(start, start + N_chunk)
+        w_1 = W_1[..., part]
+        w_2 = W_2[..., part]
+        t = 0
+        i = 0
+        while i < N_iter:
+            n = min(n_chunk, N_iter - i)
+            t_1, positions_1 = itg.rk4(t, w_1, h, n, pot.hh_evolution)
+            t_2, positions_2 = itg.rk4(t, w_2, h, n, pot.hh_evolution)
+            # Steps of this chunk among the last N_LAST steps of the run
+            last = max(N_iter - N_LAST - i, 0)
+            if last < n:
+                x_1 = positions_1[last:, 0, 0]
+                y_1 = positions_1[last:, 0, 1]
+                u_1 = positions_1[last:, 1, 0]
+                v_1 = positions_1[last:, 1, 1]
+                x_2 = positions_2[last:, 0, 0]
+                y_2 = positions_2[last:, 0, 1]
+                u_2 = positions_2[last:, 1, 0]
+                v_2 = positions_2[last:, 1, 1]
+                dist_sq = (x_2 - x_1)**2 \
+                        + (y_2 - y_1)**2 \
+                        + (u_2 - u_1)**2 \
+                        + (v_2 - v_1)**2
+                mu[part] += np.sum(dist_sq, axis=0)
+            w_1 = positions_1[-1]
+            w_2 = positions_2[-1]
+            t = t_1[-1]
+            i += n
     return mu
 
+def compute_mu_early(E: float,
+                     N_iter: int = DEFAULT_N_iter,
+                     N_part: int = DEFAULT_N_part,
+                     h: float = DEFAULT_h,
+                     N_check: int = DEFAULT_N_check,
+                     mu_c: float = DEFAULT_mu_c,
+                     safety: float = DEFAULT_safety,
+                     t_min: float = DEFAULT_t_min) -> tuple:
+    """
+    Computes the phase-space squared distances for particles of given energy
+    E, as compute_mu, but classifies the pairs every N_check steps and stops
+    integrating those already decided:
+        - chaotic if mu > safety*mu_c
+        - regular if, after a fraction t_min of the run, mu would stay below
+          mu_c/safety until the end while growing exponentially at its mean 
+          rate since the start (a regular pair grows only linearly, so this 
+          rate decreases as 2 ln(t)/t, a chaotic one tends to 2 lambda)
+    @params:
+        - E: the total energy of each particles
+        - N_iter: the number of iteration
+        - N_part: the number of particles
+        - h: integration steps
+        - N_check: number of steps between two classifications (>= 25)
+        - mu_c: critical phase-space squared distance
+        - safety: confidence factor of the classification
+        - t_min: fraction of the run before a pair can be found regular
+    @returns:
+        - mu: phase-space squared distance (over the last 25 steps before 
+          the pair was decided)
+        - chaotic: True for chaotic pairs
+        - decided: step at which each pair was decided
+    """
+    W_1, W_2 = init.n_energy_2part(pot.hh_potential, N_part, E,
+                                   sampler=init.n_energy_part_zvc)
+    return classify_pairs(W_1, W_2, N_iter, h, N_check, mu_c, safety, t_min)
+
+def classify_pairs(W_1: np.ndarray,
+                   W_2: np.ndarray,
+                   N_iter: int = DEFAULT_N_iter,
+                   h: float = DEFAULT_h,
+                   N_check: int = DEFAULT_N_check,
+                   mu_c: float = DEFAULT_mu_c,
+                   safety: float = DEFAULT_safety,
+                   t_min: float = DEFAULT_t_min,
+                   progress: tm.Progress = None) -> tuple:
+    """
+    Integrates pairs of particles and classifies them online (see 
+    compute_mu_early). With safety = np.inf, no pair is retired early and 
+    mu is the same as in compute_mu.
+    @params:
+        - W_1, W_2: the two sets of particles
+        - N_iter: the number of iteration
+        - h: integration steps
+        - N_check: number of steps between two classifications (>= 25)
+        - mu_c: critical phase-space squared distance
+        - safety: confidence factor of the classification
+        - t_min: fraction of the run before a pair can be found regular
+        - progress: progress report, updated every N_check steps
+    @returns:
+        - mu, chaotic, decided: see compute_mu_early
+    """
+    N_part = np.shape(W_1)[-1]
+    # Both sets are integrated as one batch
+    w = np.concatenate([W_1, W_2], axis=-1)
+    mu = np.zeros(N_part)
+    chaotic = np.zeros(N_part, dtype=bool)
+    decided = np.full(N_part, N_iter)
+    active = np.arange(N_part)
+    # Initial and largest squared distances of the active pairs
+    mu_0 = np.sum((W_2 - W_1)**2, axis=(0, 1))*N_LAST
+    mu_max = np.zeros(N_part)
+    t = 0
+    i = 0
+    while i < N_iter and len(active) > 0:
+        n = min(N_check, N_iter - i)
+        # The last check covers at least the last N_LAST steps of the run
+        if N_iter - i - n < N_LAST:
+            n = N_iter - i
+        mu_active = np.zeros(len(active))
+        for j in range(n):
+            w = itg.rk4_step(t, w, h, pot.hh_evolution)
+            t = t + h
+            if j >= n - N_LAST:
+                mu_active += np.sum((w[..., len(active):] 
+                                     - w[..., :len(active)])**2, 
+                                    axis=(0, 1))
+        i += n
+        if progress is not None:
+            progress.update(n, 2*len(active))
+        mu_max = np.maximum(mu_max, mu_active)
+        rate = np.maximum(np.log(mu_max/mu_0)/(i*h), 0)
+        mu_end = mu_max*np.exp(rate*(N_iter - i)*h)
+        is_chaotic = mu_active > safety*mu_c
+        is_regular = ~is_chaotic & (i >= t_min*N_iter) \
+                & (mu_end < mu_c/safety)
+        done = is_chaotic | is_regular | (i >= N_iter)
+        mu[active[done]] = mu_active[done]
+        chaotic[active[done]] = is_chaotic[done] \
+                | (~is_regular[done] & (mu_active[done] > mu_c))
+        decided[active[done]] = i
+        keep = np.concatenate([~done, ~done])
+        w = w[..., keep]
+        mu_0 = mu_0[~done]
+        mu_max = mu_max[~done]
+        active = active[~done]
+    return mu, chaotic, decided
+
+def compute_mu_all(E_all: np.ndarray = E_all,
+                   N_iter: int = DEFAULT_N_iter,
+                   N_part: int = DEFAULT_N_part,
+                   h: float = DEFAULT_h,
+                   early: bool = EARLY_STOP,
+                   progress: tm.Progress = None) -> tuple:
+    """
+    Computes the phase-space squared distances for all the energies at once:
+    the particles of every energy are tagged with the index of their energy 
+    and integrated as a single batch, then split per energy.
+    @params:
+        - E_all: the energies
+        - N_iter: the number of iteration
+        - N_part: the number of particles per energy
+        - h: integration steps
+        - early: if True, the pairs are retired once classified 
+          (see compute_mu_early)
+        - progress: progress report (see classify_pairs)
+    @returns:
+        - mu_all, chaotic_all, decided_all: lists of the results of each 
+          energy (see compute_mu_early)
+    """
+    W_1 = []
+    W_2 = []
+    for E in E_all:
+        W_1_E, W_2_E = init.n_energy_2part(pot.hh_potential, N_part, E,
+                                           sampler=init.n_energy_part_zvc)
+        W_1.append(W_1_E)
+        W_2.append(W_2_E)
+    index = np.repeat(np.arange(len(E_all)), N_part)
+    safety = DEFAULT_safety if early else np.inf
+    mu, chaotic, decided = classify_pairs(np.concatenate(W_1, axis=-1), 
+                                          np.concatenate(W_2, axis=-1),
+                                          N_iter, h, safety=safety,
+                                          progress=progress)
+    mu_all = [mu[index == k] for k in range(len(E_all))]
+    chaotic_all = [chaotic[index == k] for k in range(len(E_all))]
+    decided_all = [decided[index == k] for k in range(len(E_all))]
+    return mu_all, chaotic_all, decided_all
+
+def compute_coverage_all(E_all: np.ndarray = E_all,
+                         N_iter: int = DEFAULT_N_iter_coverage,
+                         N_part: int = DEFAULT_N_part,
+                         h: float = DEFAULT_h_coverage,
+                         N_chunk: int = DEFAULT_N_chunk,
+                         bins: int = pcs.N_COVERAGE_BINS,
+                         progress: tm.Progress = None) -> tuple:
+    """
+    Classifies the orbits from the area of the section they visit (see 
+    pcs.SectionCoverage), without twin particles: the particles of all the 
+    energies are integrated as a single batch, in chunks of N_chunk steps, 
+    and the grid is updated with the crossings of each chunk.
+    @params:
+        - E_all: the energies
+        - N_iter: the number of iteration
+        - N_part: the number of particles per energy
+        - h: integration steps (the crossings are refined, so h can be 
+          larger than for compute_mu)
+        - N_chunk: number of steps integrated at once
+        - bins: number of cells of the grid along each axis
+        - progress: progress report, updated every N_chunk steps
+    @returns:
+        - filling_all, chaotic_all: lists of the filling of the allowed area
+          and of the classification of each energy
+    """
+    W_part = np.concatenate([init.n_energy_part_zvc(pot.hh_potential, 
+                                                    N_part, E) 
+                             for E in E_all], axis=-1)
+    index = np.repeat(np.arange(len(E_all)), N_part)
+    coverage = pcs.SectionCoverage(len(index), np.asarray(E_all)[index], 
+                                   pot.hh_potential, bins=bins)
+    t = 0
+    i = 0
+    while i < N_iter:
+        n = min(N_chunk, N_iter - i)
+        t_part, coord_part = itg.rk4(t, W_part, h, n, pot.hh_evolution)
+        coord_part = np.concatenate([W_part[np.newaxis], coord_part])
+        y_pcs, v_pcs, j_pcs = pcs.pcs_crossings(coord_part[:, 0, 0], 
+                                                coord_part[:, 0, 1],
+                                                coord_part[:, 1, 0],
+                                                coord_part[:, 1, 1],
+                                                return_index=True, h=h,
+                                                func=pot.hh_evolution,
+                                                step=itg.rk4_step)
+        coverage.add(y_pcs, v_pcs, j_pcs)
+        W_part = coord_part[-1]
+        t = t_part[-1]
+        i += n
+        if progress is not None:
+            progress.update(n, len(index))
+    filling = coverage.filling()
+    chaotic = coverage.chaotic()
+    filling_all = [filling[index == k] for k in range(len(E_all))]
+    chaotic_all = [chaotic[index == k] for k in range(len(E_all))]
+    return filling_all, chaotic_all
+
 if __name__ == "__main__":
-    mu_all = []
+    with tm.Progress(DEFAULT_N_iter, "area") as progress:
+        mu_all, chaotic_all, decided_all = compute_mu_all(E_all, 
+                                                          progress=progress)
     for i in range(len(E_all)):
-        mu = compute_mu(E_all[i])
+        if EARLY_STOP:
+            filename = OUT_DIR + CLASS_PREFIX\
+                     + str(i) + EXTENSION
+            np.savetxt(filename, np.array([chaotic_all[i], decided_all[i]]).T, 
+                       fmt="%d", header="chaotic decided_step")
         filename = OUT_DIR + FILENAME_PREFIX\
                  + str(i) + EXTENSION
-        np.savetxt(filename, mu)
+        np.savetxt(filename, mu_all[i])
@@ -66,7 +66,7 @@ def compute_poincare_sections_linear(E: float,
         - y_section, v_section: arrays containing the y and v coordinates of 
           the Poincaré sections
     """
-    W_all_part = init.n_energy_part(pot.hh_potential, N_part, E)
+    W_all_part = init.n_energy_part_zvc(pot.hh_potential, N_part, E)
     y_section = []
     v_section = []
     for i in range(N_part):
@@ -38,6 +38,8 @@ import potentials as pot
 import integrator as itg
 import initial_conditions as init
 import poincare_sections as pcs
+import telemetry as tm
+import planner as pln
 
 # Parameters
 OUT_DIR = "./Output/"
@@ -46,49 +48,200 @@ EXTENSION = ".csv"
 DEFAULT_N_iter = 30000
 DEFAULT_N_part = 100
 DEFAULT_h = 0.01
+DEFAULT_N_chunk = 1000
+REFINE_SECTIONS = True # crossings refined with the integrator (error O(h^4))
 E_all = np.array([1/100, 1/12, 1/10, 1/8, 1/6])
 
 text_E = ["1/100", "1/12", "1/10", "1/8", "1/6"]
 
+def interpolation(h: float, refine: bool = REFINE_SECTIONS) -> dict:
+    """Options of pcs.pcs_crossings (and pcs.pcs_find) for the crossings: 
+    linear interpolation, or Hermite interpolation refined with rk4"""
+    if not refine:
+        return {}
+    return {"h": h, "func": pot.hh_evolution, "step": itg.rk4_step}
+
 def compute_poincare_sections_numpy(E: float,
                                     N_iter: int = DEFAULT_N_iter,
                                     N_part: int = DEFAULT_N_part,
-                                    h: float = DEFAULT_h) -> tuple:
+                                    h: float = DEFAULT_h,
+                                    on_section: bool = False,
+                                    budget: int = None,
+                                    refine: bool = REFINE_SECTIONS) -> tuple:
     """
-    Computes the Poincaré sections for a given energy E.
+    Computes the Poincaré sections for a given energy E. The integration is
+    split in particle and time chunks that fit in the memory budget (see 
+    pln.plan), and the points are returned particle by particle.
     @params:
         - E: the total energy of each particles
         - N_iter: the number of iteration
         - N_part: the number of particles
         - h: integration steps
+        - on_section: if True, the particles are seeded on the section 
+          (see init.section_part) and their initial points are kept
+        - budget: memory budget (bytes), from the available memory if None
+        - refine: if True, the crossings are refined (see interpolation)
     @returns:
         - y_section, v_section: arrays containing the y and v coordinates of 
           the Poincaré sections
     """
-    W_part = init.n_energy_part(pot.hh_potential, N_part, E)
+    if on_section:
+        W_part = init.section_part(pot.hh_potential, N_part, E)
+    else:
+        W_part = init.n_energy_part_zvc(pot.hh_potential, N_part, E)
+    y_part_section = [[] for j in range(N_part)]
+    v_part_section = [[] for j in range(N_part)]
+    N_chunk, n_chunk = pln.plan("sections", N_iter, N_part, budget)
+    for start in range(0, N_part, N_chunk):
+        w = W_part[..., start:start+N_chunk]
+        t = 0
+        i = 0
+        while i < N_iter:
+            n = min(n_chunk, N_iter - i)
+            # Perform integration
+            t_part, coord_part = itg.rk4(t, w, h, n, pot.hh_evolution)
+            if i > 0:
+                # Keep the last state of the previous chunk to find the 
+                # crossings between two chunks
+                coord_part = np.concatenate([w[np.newaxis], coord_part])
+            
+            # Find Poincaré section points for each initial condition
+            for j in range(np.shape(w)[-1]):
+                y_pcs, v_pcs = pcs.pcs_find(coord_part[:, 0, 0, j:j+1], 
+                                            coord_part[:, 0, 1, j:j+1], 
+                                            coord_part[:, 1, 0, j:j+1], 
+                                            coord_part[:, 1, 1, j:j+1],
+                                            **interpolation(h, refine))
+                y_part_section[start + j] += y_pcs
+                v_part_section[start + j] += v_pcs
+            w = coord_part[-1]
+            t = t_part[-1]
+            i += n
+    y_section = [y for y_part in y_part_section for y in y_part]
+    v_section = [v for v_part in v_part_section for v in v_part]
+    if on_section:
+        y_section = list(W_part[0, 1]) + y_section
+        v_section = list(W_part[1, 1]) + v_section
+    return y_section, v_section
+
+def compute_poincare_sections_histogram(E: float,
+                                        N_iter: int = DEFAULT_N_iter,
+                                        N_part: int = DEFAULT_N_part,
+                                        h: float = DEFAULT_h,
+                                        N_chunk: int = DEFAULT_N_chunk,
+                                        hist: pcs.SectionHistogram = None,
+                                        reservoir: int = 0,
+                                        progress: tm.Progress = None,
+                                        refine: bool = REFINE_SECTIONS
+                                        ) -> pcs.SectionHistogram:
+    """
+    Computes the Poincaré sections for a given energy E, binned on the fly
+    in a histogram: the integration is done in chunks of N_chunk steps, so 
+    the memory does not depend on N_iter.
+    @params:
+        - E: the total energy of each particles
+        - N_iter: the number of iteration
+        - N_part: the number of particles
+        - h: integration steps
+        - N_chunk: number of steps integrated at once
+        - hist: histogram to fill (a new one is created if None)
+        - reservoir: number of raw points kept in a new histogram
+        - progress: progress report, updated every N_chunk steps
+        - refine: if True, the crossings are refined (see interpolation)
+    @returns:
+        - hist: the histogram of the Poincaré section points
+    """
+    if hist is None:
+        hist = pcs.SectionHistogram(reservoir=reservoir)
+    W_part = init.n_energy_part_zvc(pot.hh_potential, N_part, E)
+    t = 0
+    i = 0
+    while i < N_iter:
+        n = min(N_chunk, N_iter - i)
+        t_part, coord_part = itg.rk4(t, W_part, h, n, pot.hh_evolution)
+        # Keep the last state of the previous chunk to find the crossings
+        # between two chunks
+        coord_part = np.concatenate([W_part[np.newaxis], coord_part])
+        y_pcs, v_pcs = pcs.pcs_crossings(coord_part[:, 0, 0], 
+                                         coord_part[:, 0, 1],
+                                         coord_part[:, 1, 0],
+                                         coord_part[:, 1, 1],
+                                         **interpolation(h, refine))
+        hist.add(y_pcs, v_pcs)
+        W_part = coord_part[-1]
+        t = t_part[-1]
+        i += n
+        if progress is not None:
+            progress.update(n, N_part)
+    return hist
+
+def compute_poincare_sections_all(E_all: np.ndarray = E_all,
+                                  N_iter: int = DEFAULT_N_iter,
+                                  N_part: int = DEFAULT_N_part,
+                                  h: float = DEFAULT_h,
+                                  N_chunk: int = DEFAULT_N_chunk,
+                                  progress: tm.Progress = None,
+                                  refine: bool = REFINE_SECTIONS) -> tuple:
+    """
+    Computes the Poincaré sections for all the energies at once: the 
+    particles of every energy are tagged with the index of their energy and
+    integrated as a single batch (in chunks of N_chunk steps), then the 
+    section points are split per energy.
+    @params:
+        - E_all: the energies
+        - N_iter: the number of iteration
+        - N_part: the number of particles per energy
+        - h: integration steps
+        - N_chunk: number of steps integrated at once
+        - progress: progress report, updated every N_chunk steps
+        - refine: if True, the crossings are refined (see interpolation)
+    @returns:
+        - y_section_all, v_section_all: lists of the arrays of the y and v 
+          coordinates of the Poincaré sections of each energy
+    """
+    W_part = np.concatenate([init.n_energy_part_zvc(pot.hh_potential, 
+                                                    N_part, E) 
+                             for E in E_all], axis=-1)
+    index = np.repeat(np.arange(len(E_all)), N_part)
     y_section = []
     v_section = []
-    
-    # Perform integration
-    t_part, coord_part = itg.rk4(0, W_part, h, N_iter, pot.hh_evolution)
-
-    # Extract positions and velocities
-    x_part = coord_part[:, 0, 0]
-    y_part = coord_part[:, 0, 1]
-    u_part = coord_part[:, 1, 0]
-    v_part = coord_part[:, 1, 1]
-
-    # Find Poincaré section points for the current initial condition
-    y_section, v_section = pcs.pcs_find(x_part, y_part, u_part, v_part)
-    return y_section, v_section
+    j_section = []
+    t = 0
+    i = 0
+    while i < N_iter:
+        n = min(N_chunk, N_iter - i)
+        t_part, coord_part = itg.rk4(t, W_part, h, n, pot.hh_evolution)
+        coord_part = np.concatenate([W_part[np.newaxis], coord_part])
+        y_pcs, v_pcs, j_pcs = pcs.pcs_crossings(coord_part[:, 0, 0], 
+                                                coord_part[:, 0, 1],
+                                                coord_part[:, 1, 0],
+                                                coord_part[:, 1, 1],
+                                                return_index=True,
+                                                **interpolation(h, refine))
+        y_section.append(y_pcs)
+        v_section.append(v_pcs)
+        j_section.append(j_pcs)
+        W_part = coord_part[-1]
+        t = t_part[-1]
+        i += n
+        if progress is not None:
+            progress.update(n, len(index))
+    # Sorted by particle (then time), as with compute_poincare_sections_numpy
+    j_section = np.concatenate(j_section)
+    order = np.argsort(j_section, kind="stable")
+    y_section = np.concatenate(y_section)[order]
+    v_section = np.concatenate(v_section)[order]
+    E_section = index[j_section[order]]
+    y_section_all = [y_section[E_section == k] for k in range(len(E_all))]
+    v_section_all = [v_section[E_section == k] for k in range(len(E_all))]
+    return y_section_all, v_section_all
 
 if __name__ == "__main__":
-    y_section_all = []
-    v_section_all = []
+    with tm.Progress(DEFAULT_N_iter, "sections") as progress:
+        y_section_all, v_section_all = compute_poincare_sections_all(
+            E_all, progress=progress)
     for i in range(len(E_all)):
-        y_section, v_section = compute_poincare_sections_numpy(E_all[i])
-        section = np.array([y_section, v_section])
+        section = np.array([y_section_all[i], v_section_all[i]])
         filename = OUT_DIR + FILENAME_PREFIX\
                  + str(text_E[i][2:]) + EXTENSION
         np.savetxt(filename, section)
-
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Parareal
+
+Parallel-in-time integration of long runs (Parareal, Lions et al. 2001): a 
+cheap coarse propagator is iterated sequentially over time slices, and 
+corrected with fine propagators running concurrently on the slices in a 
+process pool, until the slice boundaries converge.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+parareal.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import integrator as itg
+
+DEFAULT_N_slices = 8
+DEFAULT_ratio = 10
+DEFAULT_tol = 1e-10
+
+def _propagate(integrator, t: float, w: np.ndarray, h: float, n: int, 
+               func) -> tuple:
+    """Integrates n steps of size h from (t, w) with the given integrator"""
+    return integrator(t, w, h, n, func)
+
+def _coarse(integrator, t: float, w: np.ndarray, T: float, n: int, 
+            func) -> np.ndarray:
+    """Coarse propagation over a duration T in n steps"""
+    return integrator(t, w, T/n, n, func)[1][-1]
+
+def parareal(t0: float, 
+             W0: np.ndarray, 
+             h: float, 
+             n: int, 
+             func,
+             fine = itg.rk4,
+             coarse = itg.rk4,
+             N_slices: int = DEFAULT_N_slices,
+             ratio: float = DEFAULT_ratio,
+             tol: float = DEFAULT_tol,
+             max_iter: int = None,
+             max_workers: int = None,
+             return_iter: bool = False):
+    """Parareal driver around the integrators, with the output of the fine 
+    integrator (see integrator.integrator_type)
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]]
+        - h: step size (time step) of the fine integrator
+        - n: number of steps
+        - func: RHS of differential equation (picklable)
+        - fine: fine integrator, e.g. itg.rk4
+        - coarse: coarse integrator, e.g. itg.rk4 or a symplectic method
+        - N_slices: number of time slices
+        - ratio: step size of the coarse integrator, in units of h
+        - tol: convergence criterion on the slice boundaries (relative to 
+          the largest value of the state vector)
+        - max_iter: maximum number of iterations (N_slices if None, for 
+          which the result is the one of the fine integrator)
+        - max_workers: number of processes (all the cores if None, serial 
+          if 1)
+        - return_iter: if True, also returns the number of iterations
+    @returns: 
+        - t, W: time and state (solution) arrays
+        - (N_iter: number of iterations)
+    """
+    N_slices = max(1, min(N_slices, n))
+    if max_iter is None:
+        max_iter = N_slices
+    # First step index of each slice
+    start = np.linspace(0, n, N_slices + 1).astype(int)
+    T_slices = np.diff(start)*h
+    n_coarse = np.maximum(1, np.round(T_slices/(ratio*h))).astype(int)
+    t_slices = t0 + start*h
+
+    def G(k, w):
+        return _coarse(coarse, t_slices[k], w, T_slices[k], n_coarse[k], 
+                       func)
+
+    # Initial guess of the slice boundaries from the coarse integrator
+    U = [W0]
+    for k in range(N_slices):
+        U.append(G(k, U[k]))
+    G_old = U[1:]
+
+    time = np.zeros(n)
+    W = np.zeros((n,) + np.shape(W0))
+    pool = None if max_workers == 1 \
+            else ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        for N_iter in range(1, max_iter + 1):
+            # The slices before N_iter - 1 start from an exact state and 
+            # are not recomputed
+            first = N_iter - 1
+            args = [(fine, t_slices[k], U[k], h, start[k+1] - start[k], func)
+                    for k in range(first, N_slices)]
+            if pool is None:
+                results = [_propagate(*arg) for arg in args]
+            else:
+                results = list(pool.map(_propagate, *zip(*args)))
+            F = {}
+            for k, (t_k, W_k) in zip(range(first, N_slices), results):
+                time[start[k]:start[k+1]] = t_k
+                W[start[k]:start[k+1]] = W_k
+                F[k] = W_k[-1]
+
+            # Sequential correction: U_k+1 = G(U_k) + F(U_k^old) - G(U_k^old)
+            scale = max(np.max(np.abs(W0)), 1)
+            delta = 0
+            U_new = U[:first+1]
+            for k in range(first, N_slices):
+                G_new = G(k, U_new[k])
+                U_new.append(G_new + F[k] - G_old[k])
+                G_old[k] = G_new
+                delta = max(delta, np.max(np.abs(U_new[k+1] - U[k+1])))
+            U = U_new
+            if delta <= tol*scale:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if return_iter:
+        return time, W, N_iter
+    return time, W
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Memory Planner
+
+Estimates the memory used by the pipelines (integrator buffers and 
+trajectories, Poincaré section search, Gottwald-Melbourne arrays) and splits 
+the runs into particle and time chunks that fit in a memory budget, by default 
+a fraction of the available memory.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+planner.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+
+FLOAT_BYTES = 8
+STATE_BYTES = 4*FLOAT_BYTES # one state [[x, y], [u, v]]
+BUDGET_FRACTION = 0.5 # of the available memory
+MIN_STEPS = 100 # shortest time chunk before the particles are split
+# Number of arrays of each pipeline, per particle:
+#     - "trajectory": states saved at each step, and states used by one step
+#       of rk4 (w, k1, k2, k3, k4 and a temporary)
+#     - "sections": x_i * x_i+1 and its mask in pcs_crossings, and the points
+#       (y, v) found
+#     - "mu": two trajectories
+#     - "gm": t, x, y, u, v, theta, x cos(theta), p
+RK4_BUFFERS = 6
+SECTION_BUFFERS = 4
+GM_ARRAYS = 8
+PIPELINES = ["trajectory", "sections", "mu", "gm"]
+
+def available_memory() -> int:
+    """Available memory (bytes)"""
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])*1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES")*os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return 2**31 # unknown: 2 GiB
+
+def default_budget() -> int:
+    """Default memory budget (bytes)"""
+    return int(BUDGET_FRACTION*available_memory())
+
+def footprint_coefficients(pipeline: str) -> tuple:
+    """Footprint of a pipeline, a*n + b bytes per particle for n steps
+    @ returns:
+        - a, b
+    """
+    if pipeline == "trajectory":
+        return STATE_BYTES, RK4_BUFFERS*STATE_BYTES
+    if pipeline == "sections":
+        # The last state of the previous time chunk is added to the chunk
+        return (STATE_BYTES + SECTION_BUFFERS*FLOAT_BYTES, 
+                (RK4_BUFFERS + 1)*STATE_BYTES)
+    if pipeline == "mu":
+        return 2*STATE_BYTES, 2*RK4_BUFFERS*STATE_BYTES
+    if pipeline == "gm":
+        return (STATE_BYTES + GM_ARRAYS*FLOAT_BYTES, 
+                RK4_BUFFERS*STATE_BYTES)
+    raise KeyError("Unknown pipeline: {}".format(pipeline))
+
+def footprint(pipeline: str, n: int, N: int) -> int:
+    """Estimated memory of a pipeline (bytes)
+    @ params:
+        - pipeline: "trajectory", "sections", "mu" or "gm"
+        - n: number of steps
+        - N: number of particles
+    @ returns:
+        - memory (bytes)
+    """
+    a, b = footprint_coefficients(pipeline)
+    return N*(a*n + b)
+
+def plan(pipeline: str, 
+         n: int, 
+         N: int, 
+         budget: int = None,
+         n_min: int = MIN_STEPS) -> tuple:
+    """Chunks of a run that fit in a memory budget: the run is split in time
+    first (all the particles integrated together), and also between the
+    particles if the time chunks would be shorter than n_min steps
+    @ params:
+        - pipeline: "trajectory", "sections", "mu" or "gm"
+        - n: number of steps
+        - N: number of particles
+        - budget: memory budget (bytes), default_budget() if None
+        - n_min: shortest time chunk
+    @ returns:
+        - N_chunk: number of particles integrated together
+        - n_chunk: number of steps integrated at once
+    """
+    if budget is None:
+        budget = default_budget()
+    a, b = footprint_coefficients(pipeline)
+    if footprint(pipeline, n, N) <= budget:
+        return N, n
+    n_chunk = int((budget/N - b)//a)
+    if n_chunk >= min(n_min, n):
+        return N, n_chunk
+    n_chunk = min(n_min, n)
+    N_chunk = max(1, int(budget//(a*n_chunk + b)))
+    return N_chunk, n_chunk
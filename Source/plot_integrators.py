@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""
+Plot: Integrators
+
+Plots the results of the integrators benchmark (bench_integrators.py): CPU 
+time and energy error against the step size, cost per accuracy, and the orbits 
+computed with the smallest step size.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+plot_integrators.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.patches import ConnectionPatch
+
+import integrator as itg
+import potentials as pot
+import bench_integrators as bench
+import trajectory as trj
+
+if "YII_1" in plt.style.available: plt.style.use("YII_1")
+
+H_ORBIT = 0.001
+MEMMAP = False # orbits written to (and read lazily from) files
+STYLES = {"Analytical": ("-.", "k"),
+          "Euler": ("o-", "C0"),
+          "RK2": ("s--", "C2"),
+          "RK4": ("^:", "C3"),
+          "DOP853": ("d-.", "C4"),
+          "Radau15": ("v-", "C6"),
+          "BS12": ("p--", "C8")}
+
+def machine_epsilon() -> float:
+    """Computes the machine epsilon"""
+    eps = 1.0
+    while 1.0 + eps/2 > 1.0:
+        eps /= 2.0
+    return eps
+
+def style(method: str, i: int = 0) -> tuple:
+    """Line style and color of a method (default cycle for unknown ones)"""
+    return STYLES.get(method, ("x-", "C{}".format(7 + i)))
+
+def plot_time(results: list, e: float = 0.) -> int:
+    """Plots the CPU time against the step size, for one orbit"""
+    fig, ax = plt.subplots()
+    for i, method in enumerate(sorted({row["method"] for row in results})):
+        cols = bench.select(results, method=method, e=e)
+        if not cols: continue
+        fmt, color = style(method, i)
+        ax.plot(cols["h"], cols["time"], fmt, color=color, label=method)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("Step size $\\Var{{t}}$")
+    ax.set_ylabel("CPU Time $t_\\mathrm{CPU}\\axunit{{s}}$")
+    ax.legend(loc="best")
+    fig.tight_layout()
+    fig.savefig("Figs/dt_vs_cpu_time_loglog.pdf")
+    return 0
+
+def plot_error(results: list, e: float = 0.) -> int:
+    """Plots the energy error against the step size, for one orbit"""
+    fig, ax = plt.subplots()
+    for i, method in enumerate(sorted({row["method"] for row in results})):
+        cols = bench.select(results, method=method, e=e)
+        if not cols: continue
+        fmt, color = style(method, i)
+        ax.plot(cols["h"], cols["err_energy"], fmt, color=color, label=method)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.axhline(machine_epsilon(), color='darkred', ls='-.', 
+               label='Machine precision $\\epsilon$')
+    ax.set_xlabel("Step size $\\Var{{t}}$")
+    ax.set_ylabel("$\\abs{{E_{\\mathrm{analytical}} "
+                  "- E_{\\mathrm{numerical}}}}$")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig("Figs/timestep_vs_final_energy_error_loglog1.pdf")
+    return 0
+
+def plot_cost(results: list) -> int:
+    """Plots the energy error against the CPU time (cost per accuracy), with
+    one panel per orbit eccentricity"""
+    e_all = sorted({row["e"] for row in results})
+    fig, axs = plt.subplots(1, len(e_all), sharey=True, squeeze=False)
+    axs = axs[0]
+    for j, e in enumerate(e_all):
+        ax = axs[j]
+        for i, method in enumerate(sorted({row["method"] 
+                                           for row in results})):
+            cols = bench.select(results, method=method, e=e)
+            if not cols: continue
+            fmt, color = style(method, i)
+            ax.plot(cols["time"], cols["err_energy"], fmt, color=color, 
+                    label=method)
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_title("$e = {:.1f}$".format(e))
+        ax.set_xlabel("CPU Time $t_\\mathrm{CPU}\\axunit{{s}}$")
+    axs[0].set_ylabel("$\\abs{{E_{\\mathrm{analytical}} "
+                      "- E_{\\mathrm{numerical}}}}$")
+    axs[0].legend(loc="best")
+    fig.savefig("Figs/cost_per_accuracy.pdf")
+    return 0
+
+def plot_orbit(methods: list = ["Euler", "RK2", "RK4"], 
+               h: float = H_ORBIT, 
+               T_final: float = bench.T_FINAL,
+               memmap: bool = MEMMAP) -> int:
+    """Plots the circular orbit computed with each method for one step size,
+    with two zooms on the starting point (the orbits are written to files in
+    the output directory if memmap is True)"""
+    W0 = bench.kepler_orbit(0)
+    N = int(T_final / h)
+    solutions = {"Analytical": itg.kepler_eccentric(0, W0, h, N)[1]}
+    for method in methods:
+        if memmap:
+            filename = bench.OUT_DIR + "orbit_" + method + trj.EXTENSION
+            solutions[method] = trj.integrate_to_file(
+                filename, 0, W0, h, N, pot.kepler_evolution, 
+                bench.METHODS[method]).W
+        else:
+            solutions[method] = itg.integrator_type(0, W0, h, N, 
+                                                    pot.kepler_evolution,
+                                                    bench.METHODS[method])[1]
+    mosaic = ("AB\n"
+              "AC")
+    fig, axs = plt.subplot_mosaic(mosaic)
+    axs = list(axs.values())
+    for i in [0,1,2]:
+        for j, (label, W) in enumerate(solutions.items()):
+            fmt, color = style(label, j)
+            axs[i].plot(W[:, 0, 0], W[:, 0, 1], fmt.strip("os^x"), 
+                        color=color, label=label, 
+                        zorder=4 if label == "Analytical" else 2)
+        axs[i].set_aspect("equal")
+
+    axs[0].set_xlabel("$x$")
+    axs[0].set_ylabel("$y$")
+    axs[0].legend(loc="upper left")
+
+    win_1 = 0.02
+    axs[1].set_xlim(0 - win_1, 0 + win_1)
+    axs[1].set_ylim(1 - win_1, 1 + win_1)
+    win_2 = 1e-6
+    axs[2].set_xlim(0 - win_2, 0 + win_2)
+    axs[2].set_ylim(1 - win_2, 1 + win_2)
+
+    for (xyB, axA, axB) in [((0-win_1, 1+win_1), axs[0], axs[1]),
+                            ((0-win_1, 1-win_1), axs[0], axs[1]),
+                            ((0-win_2, 1+win_2), axs[1], axs[2]),
+                            ((0+win_2, 1+win_2), axs[1], axs[2])]:
+        ln = ConnectionPatch(xyA=(0,1), xyB=xyB, 
+                             coordsA="data", coordsB="data",
+                             axesA=axA, axesB=axB, 
+                             color="k", lw=1, alpha=0.5)
+        fig.add_artist(ln)
+    fig.savefig("Figs/orbit_dt.pdf")
+    return 0
+
+def plot_all(results: list) -> int:
+    """Makes all the figures of the benchmark"""
+    plot_orbit()
+    plot_time(results)
+    plot_error(results)
+    plot_cost(results)
+    return 0
+
+if __name__ == "__main__":
+    plot_all(bench.load_results())
+    plt.show()
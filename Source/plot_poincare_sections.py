@@ -34,22 +34,35 @@ along with this program. If not, see https://www.gnu.org/licenses/.
 
 """
 import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+import poincare_sections as pcs
+import rendering as rdr
+
 if "YII_1" in plt.style.available: plt.style.use("YII_1")
 
 OUT_DIR = "./Output/"
 FILENAME_PREFIX = "poincare_sections_"
 EXTENSION = ".csv"
+AGGREGATE = True
+WINDOWS = {} # e.g. {"12": (ymin, ymax, vmin, vmax)} to zoom on E = 1/12
 
-def plot_poincare_sections(filelist: list, title:str = "") -> int:
+def plot_poincare_sections(filelist: list, 
+                           title: str = "",
+                           aggregate: bool = AGGREGATE,
+                           windows: dict = WINDOWS) -> int:
     """
     Plot all the Poincaré sections in the file list.
     @params:
         - filelist: the list of files in the output directory, with the format 
         "poincare_sections_{linear, parallel}_[1/E].csv"
         - title: title of the figure
+        - aggregate: if True, the points are binned on the pixels of the 
+          figure (see rendering.plot_density), otherwise they are scattered
+        - windows: (ymin, ymax, vmin, vmax) to zoom on, for each 1/E (as a 
+          string, e.g. "12"); only the points inside are binned
     @returns: 
         - 0.
     """
@@ -72,12 +85,20 @@ def plot_poincare_sections(filelist: list, title:str = "") -> int:
                  .replace(EXTENSION, "")
                  .replace("linear_", "")
                  .replace("parallel_", ""))
-        data = np.loadtxt(OUT_DIR + filename)
+        data = pcs.load_section(OUT_DIR + filename)
         y_section = data[0]
         v_section = data[1]
-        ax.scatter(y_section, v_section, 
-                   s=.1, color="C3", marker=",", alpha=0.5,
-                   label="$E = 1/{}$".format(inv_E))
+        label = "$E = 1/{}$".format(inv_E)
+        if aggregate:
+            rdr.plot_density(ax, y_section, v_section, 
+                             window=windows.get(inv_E), label=label)
+        else:
+            ax.scatter(y_section, v_section, 
+                       s=.1, color="C3", marker=",", alpha=0.5,
+                       label=label)
+            if inv_E in windows:
+                ax.set_xlim(windows[inv_E][0], windows[inv_E][1])
+                ax.set_ylim(windows[inv_E][2], windows[inv_E][3])
         ax.set_xlabel("$y$")
         ax.set_ylabel("$v$")
         ax.legend(loc="upper right")
@@ -89,17 +110,22 @@ def plot_poincare_sections(filelist: list, title:str = "") -> int:
     else: kind = "error"
     fig.savefig("Figs/pcs_{}.pdf".format(kind))
     return 0
-print("\033[32m" 
-      + "[P]arallel or [L]inear algorithm result, or [B]oth?" 
-      + "\033[0m")
-answer = input("\033[32m" + "> " + "\033[0m").upper()
+# The answer can be given as argument (e.g. by cli.py)
+if len(sys.argv) > 1:
+    answer = sys.argv[1].upper()
+else:
+    print("\033[32m" 
+          + "[P]arallel or [L]inear algorithm result, or [B]oth?" 
+          + "\033[0m")
+    answer = input("\033[32m" + "> " + "\033[0m").upper()
 
 if answer == "P":
     FILENAME_PREFIX += "parallel_"
 elif answer == "L":
     FILENAME_PREFIX += "linear_"
 
-filelist = [fname for fname in os.listdir(OUT_DIR) if FILENAME_PREFIX in fname]
+filelist = [fname for fname in os.listdir(OUT_DIR) 
+            if FILENAME_PREFIX in fname and fname.endswith(EXTENSION)]
 
 if answer in ["L", "B"]:
     filelist_linear = [fname for fname in filelist if "linear_" in fname]
@@ -33,22 +33,69 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see https://www.gnu.org/licenses/.
 """
 import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
+import poincare_sections as pcs
+import rendering as rdr
+
 if "YII_1" in plt.style.available: plt.style.use("YII_1")
 
 OUT_DIR = "./Output/"
 FILENAME_PREFIX = "poincare_sections_"
 EXTENSION = ".csv"
-
-def plot_poincare_sections(filelist: list, title:str = "") -> int:
+AGGREGATE = True
+# Default (ymin, ymax, vmin, vmax) around the resonance island chains of the
+# default runs, for each 1/E (see parse_windows to give others)
+WINDOWS = {"100": (-0.14, -0.06, -0.08, 0.08),
+           "12": (-0.15, 0.15, 0.15, 0.35),
+           "10": (-0.15, 0.15, 0.15, 0.35),
+           "8": (-0.15, 0.15, 0.15, 0.35),
+           "6": (0.0, 0.7, -0.15, 0.15)}
+
+def parse_windows(args: list) -> dict:
+    """Windows given on the command line, as "1/E=ymin,ymax,vmin,vmax" 
+    (e.g. "12=-0.15,0.15,0.15,0.35")
+    @params:
+        - args: the arguments
+    @returns: 
+        - windows: (ymin, ymax, vmin, vmax) for each 1/E (as a string)
+    """
+    windows = {}
+    for arg in args:
+        inv_E, _, values = arg.partition("=")
+        window = tuple(float(value) for value in values.split(","))
+        if len(window) != 4 or window[0] >= window[1] \
+                or window[2] >= window[3]:
+            raise ValueError("Invalid window: {}".format(arg))
+        windows[inv_E] = window
+    return windows
+
+def data_window(window: tuple, y: np.ndarray, v: np.ndarray) -> tuple:
+    """The window if it contains points of the section, otherwise None (the
+    full extent of the points)"""
+    if window is None:
+        return None
+    inside = (y >= window[0]) & (y <= window[1]) \
+            & (v >= window[2]) & (v <= window[3])
+    return window if np.any(inside) else None
+
+def plot_poincare_sections(filelist: list, 
+                           title: str = "",
+                           aggregate: bool = AGGREGATE,
+                           windows: dict = WINDOWS) -> int:
     """
     Plot all the Poincaré sections in the file list.
     @params:
         - filelist: the list of files in the output directory, with the format 
         "poincare_sections_{linear, parallel}_[1/E].csv"
         - title: title of the figure
+        - aggregate: if True, the points are binned on the pixels of the 
+          figure (see rendering.plot_density), otherwise they are scattered
+        - windows: (ymin, ymax, vmin, vmax) to zoom on, for each 1/E (as a 
+          string, e.g. "12"); only the points inside are binned, and a window
+          without any point is replaced by the full extent of the points
     @returns: 
         - 0.
     """
@@ -77,12 +124,21 @@ def plot_poincare_sections(filelist: list, title:str = "") -> int:
                  .replace(EXTENSION, "")
                  .replace("linear_", "")
                  .replace("parallel_", ""))
-        data = np.loadtxt(OUT_DIR + filename)
+        data = pcs.load_section(OUT_DIR + filename)
         y_section = data[0]
         v_section = data[1]
-        ax.scatter(y_section, v_section, 
-                   s=.1, color="C3", marker=",", alpha=0.5,
-                   label="$E = 1/{}$".format(inv_E))
+        label = "$E = 1/{}$".format(inv_E)
+        window = data_window(windows.get(inv_E), y_section, v_section)
+        if aggregate:
+            rdr.plot_density(ax, y_section, v_section, 
+                             window=window, label=label)
+        else:
+            ax.scatter(y_section, v_section, 
+                       s=.1, color="C3", marker=",", alpha=0.5,
+                       label=label)
+            if window is not None:
+                ax.set_xlim(window[0], window[1])
+                ax.set_ylim(window[2], window[3])
         ax.set_xlabel("$y$")
         ax.set_ylabel("$v$")
         ax.legend(loc="upper right")
@@ -97,27 +153,36 @@ def plot_poincare_sections(filelist: list, title:str = "") -> int:
     fig3.savefig("Figs/pcs_zoom_3_{}.pdf".format(kind))
     return 0
 
-print("\033[32m" 
-      + "[P]arallel or [L]inear algorithm result, or [B]oth?" 
-      + "\033[0m")
-answer = input("\033[32m" + "> " + "\033[0m").upper()
+# The answer can be given as argument (e.g. by cli.py), followed by windows
+# (see parse_windows) replacing the default ones
+windows = {**WINDOWS, **parse_windows(sys.argv[2:])}
+if len(sys.argv) > 1:
+    answer = sys.argv[1].upper()
+else:
+    print("\033[32m" 
+          + "[P]arallel or [L]inear algorithm result, or [B]oth?" 
+          + "\033[0m")
+    answer = input("\033[32m" + "> " + "\033[0m").upper()
 
 if answer == "P":
     FILENAME_PREFIX += "parallel_"
 elif answer == "L":
     FILENAME_PREFIX += "linear_"
 
-filelist = [fname for fname in os.listdir(OUT_DIR) if FILENAME_PREFIX in fname]
+filelist = [fname for fname in os.listdir(OUT_DIR) 
+            if FILENAME_PREFIX in fname and fname.endswith(EXTENSION)]
 
 if answer in ["L", "B"]:
     filelist_linear = [fname for fname in filelist if "linear_" in fname]
     plot_poincare_sections(filelist_linear, 
                            title=("Poincaré Sections "
-                                  "(results from the linear algorithm)"))
+                                  "(results from the linear algorithm)"),
+                           windows=windows)
 if answer in ["P", "B"]:
     filelist_parallel = [fname for fname in filelist if "parallel_" in fname]
     plot_poincare_sections(filelist_parallel, 
                            title=("Poincaré Sections "
-                                  "(results from the parallel algorithm)"))
+                                  "(results from the parallel algorithm)"),
+                           windows=windows)
 
 plt.show()
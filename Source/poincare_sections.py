@@ -32,18 +32,34 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see https://www.gnu.org/licenses/.
 """
 
+import os
 import numpy as np
-def pcs_find(pos_x, pos_y, vel_x, vel_y):
+
+Y_RANGE = (-0.6, 1.1)
+V_RANGE = (-0.6, 0.6)
+N_BINS = 512
+N_COVERAGE_BINS = 32 # cells per axis of the allowed region of each energy
+N_COVERAGE_FINE = 4097 # samples of V(0, y) for the allowed region
+DEFAULT_filling_c = 0.45 # filling above which an orbit is chaotic
+N_NEWTON = 3 # iterations of the root finding on the Hermite polynomial
+
+def pcs_find(pos_x, pos_y, vel_x, vel_y, h=None, func=None, step=None):
     """Find Poincaré sections (PCS; x = 0)
     @ params:
         - pos_x: position along the x axis
         - pos_y: position along the y axis
         - pos_x: velocity along the x axis
         - pos_y: velocity along the y axis
+        - h, func, step: if func is given, higher-order interpolation of 
+          the crossings (see pcs_crossings)
     @ returns: (tuple)
         - pcs_pos_y: position of the points in the PCS along the y axis
         - pcs_vel_y: velocity of the points in the PCS along the y axis
     """
+    if func is not None:
+        pcs_pos_y, pcs_vel_y = pcs_crossings(pos_x, pos_y, vel_x, vel_y,
+                                             h=h, func=func, step=step)
+        return list(pcs_pos_y), list(pcs_vel_y)
     if np.ndim(pos_x) == 1: 
         pos_x = np.array([pos_x])
         pos_y = np.array([pos_y])
@@ -70,6 +86,344 @@ def pcs_find(pos_x, pos_y, vel_x, vel_y):
             i += 1
     return pcs_pos_y, pcs_vel_y
 
+def hermite(w0, w1, f0, f1, h, s):
+    """Cubic Hermite interpolation between two states w0 and w1 a step h 
+    apart, with derivatives f0 and f1, at the fraction s of the step"""
+    s2 = s*s
+    s3 = s2*s
+    return (2*s3 - 3*s2 + 1)*w0 + (s3 - 2*s2 + s)*h*f0 \
+            + (3*s2 - 2*s3)*w1 + (s3 - s2)*h*f1
+
+def hermite_ds(w0, w1, f0, f1, h, s):
+    """Derivative of the Hermite interpolation (see hermite) along s"""
+    s2 = s*s
+    return (6*s2 - 6*s)*(w0 - w1) + (3*s2 - 4*s + 1)*h*f0 \
+            + (3*s2 - 2*s)*h*f1
+
+def pcs_crossings(pos_x, pos_y, vel_x, vel_y, return_index=False, 
+                  h=None, func=None, step=None):
+    """Find Poincaré sections (PCS; x = 0), as pcs_find but vectorized over 
+    the particles and the time steps. The crossings are interpolated 
+    linearly between the two steps (error O(h^2)), or, if func is given,
+    with the cubic Hermite polynomial of the states and their derivatives 
+    (error O(h^4)), whose root is found by Newton's method. If step is 
+    also given, the crossing is then refined by integrating from the 
+    previous state to the root, followed by a Newton step in time, which 
+    gives the accuracy of the integrator.
+    @ params:
+        - pos_x: position along the x axis
+        - pos_y: position along the y axis
+        - vel_x: velocity along the x axis
+        - vel_y: velocity along the y axis
+        - return_index: if True, also returns the particle of each point
+        - h: step size of the trajectory (for func)
+        - func: RHS of the (autonomous) differential equation
+        - step: one step of the integrator (e.g. integrator.rk4_step)
+    @ returns: (tuple)
+        - pcs_pos_y: array of the positions of the points in the PCS along y
+        - pcs_vel_y: array of the velocities of the points in the PCS along y
+        - (pcs_index: index of the particle of each point)
+    """
+    if np.ndim(pos_x) == 1: 
+        pos_x = np.array([pos_x]).T
+        pos_y = np.array([pos_y]).T
+        vel_x = np.array([vel_x]).T
+        vel_y = np.array([vel_y]).T
+    # Particle first, then time (same order as pcs_find)
+    j, i = np.nonzero((pos_x[:-1] * pos_x[1:] < 0).T)
+    frac = (0 - pos_x[i, j])/(pos_x[i+1, j] - pos_x[i, j])
+    if func is None:
+        pcs_pos_y = pos_y[i, j] + (pos_y[i+1, j] - pos_y[i, j])*frac
+        pcs_vel_y = vel_y[i, j] + (vel_y[i+1, j] - vel_y[i, j])*frac
+    else:
+        w0 = np.array([[pos_x[i, j], pos_y[i, j]], 
+                       [vel_x[i, j], vel_y[i, j]]])
+        w1 = np.array([[pos_x[i+1, j], pos_y[i+1, j]], 
+                       [vel_x[i+1, j], vel_y[i+1, j]]])
+        f0 = func(0, w0)
+        f1 = func(0, w1)
+        s = frac
+        for k in range(N_NEWTON):
+            x = hermite(w0[0, 0], w1[0, 0], f0[0, 0], f1[0, 0], h, s)
+            dx = hermite_ds(w0[0, 0], w1[0, 0], f0[0, 0], f1[0, 0], h, s)
+            s = np.clip(s - x/dx, 0, 1)
+        if step is None:
+            w = hermite(w0, w1, f0, f1, h, s)
+        else:
+            w = step(0, w0, s*h, func)
+            w = step(0, w, -w[0, 0]/w[1, 0], func)
+        pcs_pos_y = w[0, 1]
+        pcs_vel_y = w[1, 1]
+    if return_index:
+        return pcs_pos_y, pcs_vel_y, j
+    return pcs_pos_y, pcs_vel_y
+
+class SectionHistogram:
+    """Streaming accumulator of Poincaré section points: the points are
+    binned on a fixed (y, v) grid as they are produced, so that the output 
+    size does not depend on the length of the run. Histograms of several 
+    chunks or workers with the same grid can be merged. Optionally, a 
+    uniform random sample of the raw points is kept (reservoir sampling).
+    """
+    def __init__(self,
+                 y_range: tuple = Y_RANGE,
+                 v_range: tuple = V_RANGE,
+                 bins: int = N_BINS,
+                 reservoir: int = 0,
+                 seed = None):
+        """
+        @ params:
+            - y_range: (min, max) of the grid along y
+            - v_range: (min, max) of the grid along v
+            - bins: number of bins along each axis
+            - reservoir: number of raw points kept (0 for none)
+            - seed: seed of the reservoir random generator
+        """
+        self.y_edges = np.linspace(y_range[0], y_range[1], bins + 1)
+        self.v_edges = np.linspace(v_range[0], v_range[1], bins + 1)
+        self.counts = np.zeros((bins, bins), dtype=np.int64)
+        self.n_total = 0
+        self.n_outside = 0
+        self.reservoir_size = reservoir
+        self.reservoir = np.zeros((2, 0))
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, y: np.ndarray, v: np.ndarray) -> None:
+        """Adds section points to the histogram (and the reservoir)
+        @ params:
+            - y, v: coordinates of the points
+        """
+        y = np.ravel(y)
+        v = np.ravel(v)
+        counts = np.histogram2d(y, v, bins=(self.y_edges, self.v_edges))[0]
+        counts = counts.astype(np.int64)
+        self.n_outside += len(y) - np.sum(counts)
+        self.counts += counts
+        if self.reservoir_size > 0:
+            self._sample(np.array([y, v]))
+        self.n_total += len(y)
+
+    def _sample(self, points: np.ndarray) -> None:
+        """Algorithm R on a batch of points"""
+        k = self.reservoir_size
+        n_free = max(k - np.shape(self.reservoir)[1], 0)
+        self.reservoir = np.concatenate([self.reservoir, points[:, :n_free]], 
+                                        axis=1)
+        points = points[:, n_free:]
+        seen = self.n_total + n_free + np.arange(1, np.shape(points)[1] + 1)
+        slot = (self.rng.random(len(seen))*seen).astype(np.int64)
+        keep = slot < k
+        self.reservoir[:, slot[keep]] = points[:, keep]
+
+    def merge(self, other: "SectionHistogram") -> "SectionHistogram":
+        """Merges another histogram (same grid and reservoir size) into this
+        one
+        @ params:
+            - other: histogram to merge
+        @ returns:
+            - self
+        """
+        if not (np.array_equal(self.y_edges, other.y_edges) 
+                and np.array_equal(self.v_edges, other.v_edges)):
+            raise ValueError("Cannot merge histograms with different grids")
+        if self.reservoir_size != other.reservoir_size:
+            raise ValueError("Cannot merge histograms with different "
+                             "reservoir sizes")
+        if self.reservoir_size > 0:
+            self._merge_reservoir(other)
+        self.counts += other.counts
+        self.n_total += other.n_total
+        self.n_outside += other.n_outside
+        return self
+
+    def _merge_reservoir(self, other: "SectionHistogram") -> None:
+        """Uniform sample of the union of the two runs, from their uniform 
+        samples: the number of points taken from each run is hypergeometric
+        (as if drawn without replacement from all the points), then the 
+        points are drawn uniformly in each reservoir"""
+        n = (self.n_total, other.n_total)
+        kept = (np.shape(self.reservoir)[1], np.shape(other.reservoir)[1])
+        # Both reservoirs are full or hold all the points of their run
+        k = min(self.reservoir_size, n[0] + n[1])
+        if k == 0:
+            self.reservoir = np.zeros((2, 0))
+            return
+        k_self = self.rng.hypergeometric(n[0], n[1], k) if n[1] > 0 else k
+        if n[0] == 0:
+            k_self = 0
+        keep_self = self.rng.choice(kept[0], k_self, replace=False)
+        keep_other = self.rng.choice(kept[1], k - k_self, replace=False)
+        self.reservoir = np.concatenate([self.reservoir[:, keep_self], 
+                                         other.reservoir[:, keep_other]], 
+                                        axis=1)
+
+    def save(self, filename: str) -> None:
+        """Saves the histogram in a .npz file"""
+        np.savez(filename, 
+                 counts=self.counts, 
+                 y_edges=self.y_edges, 
+                 v_edges=self.v_edges,
+                 n_total=self.n_total, 
+                 n_outside=self.n_outside,
+                 reservoir_size=self.reservoir_size,
+                 reservoir=self.reservoir)
+
+    @classmethod
+    def load(cls, filename: str) -> "SectionHistogram":
+        """Loads a histogram saved with save"""
+        data = np.load(filename)
+        hist = cls(y_range=(data["y_edges"][0], data["y_edges"][-1]),
+                   v_range=(data["v_edges"][0], data["v_edges"][-1]),
+                   bins=len(data["y_edges"]) - 1,
+                   reservoir=int(data["reservoir_size"]))
+        hist.y_edges = data["y_edges"]
+        hist.v_edges = data["v_edges"]
+        hist.counts = data["counts"]
+        hist.n_total = int(data["n_total"])
+        hist.n_outside = int(data["n_outside"])
+        hist.reservoir = data["reservoir"]
+        return hist
+
+class SectionCoverage:
+    """Occupancy grid of the section points of each orbit: the cells 
+    visited by each particle are kept in a spatial hash (the sorted unique 
+    keys particle*bins^2 + cell), updated with the points of each chunk. A 
+    chaotic orbit fills a 2D region of the section while a regular one 
+    traces a curve, so the fraction of the allowed area that is visited 
+    separates them from much shorter runs than the phase-space distance.
+    The grid of each energy spans the allowed region of the section at 
+    this energy, so that it has about as many allowed cells at all 
+    energies.
+    """
+    def __init__(self,
+                 N_part: int,
+                 E,
+                 potential,
+                 y_range: tuple = Y_RANGE,
+                 v_range: tuple = V_RANGE,
+                 bins: int = N_COVERAGE_BINS):
+        """
+        @ params:
+            - N_part: number of particles
+            - E: energy of the particles (scalar or one per particle)
+            - potential: potential of the particles (e.g. hh_potential)
+            - y_range: (min, max) of y where the allowed region is searched
+            - v_range: (min, max) of v where the allowed region is searched
+            - bins: number of cells along each axis
+        """
+        self.N_part = N_part
+        self.bins = bins
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.n_points = np.zeros(N_part, dtype=np.int64)
+        E = np.broadcast_to(E, (N_part,))
+        E_unique, inverse = np.unique(E, return_inverse=True)
+        # Allowed region on the section (x = 0, u^2 >= 0) of each energy: 
+        # V(0, y) + v^2/2 <= E
+        y_fine = np.linspace(y_range[0], y_range[1], N_COVERAGE_FINE)
+        V_fine = potential(np.array([np.zeros_like(y_fine), y_fine]), 
+                           position_only=True)
+        dy = y_fine[1] - y_fine[0]
+        ranges = np.zeros((len(E_unique), 4))
+        n_allowed = np.zeros(len(E_unique), dtype=np.int64)
+        for k, E_k in enumerate(E_unique):
+            allowed = V_fine <= E_k
+            y_allowed = y_fine[allowed] if np.any(allowed) \
+                    else y_fine[[np.argmin(V_fine)]]
+            v_max = np.sqrt(2*max(E_k - np.min(V_fine), 0))
+            v_max = min(max(v_max*(1 + 1e-3), dy), 
+                        max(-v_range[0], v_range[1]))
+            ranges[k] = (max(y_allowed[0] - dy, y_range[0]), 
+                         min(y_allowed[-1] + dy, y_range[1]),
+                         -v_max, v_max)
+            # Allowed cells (center in the allowed region)
+            y = ranges[k, 0] + (np.arange(bins) + 0.5)*(ranges[k, 1] 
+                                                        - ranges[k, 0])/bins
+            v = ranges[k, 2] + (np.arange(bins) + 0.5)*(ranges[k, 3] 
+                                                        - ranges[k, 2])/bins
+            Y, V = np.meshgrid(y, v, indexing="ij")
+            E_cell = potential(np.array([np.zeros_like(Y), Y]), 
+                               position_only=True) + V**2/2
+            n_allowed[k] = max(np.sum(E_cell <= E_k), 1)
+        self.ranges = ranges[inverse]
+        self.n_allowed = n_allowed[inverse]
+
+    def add(self, y: np.ndarray, v: np.ndarray, index: np.ndarray) -> None:
+        """Adds section points
+        @ params:
+            - y, v: coordinates of the points
+            - index: particle of each point
+        """
+        index = np.asarray(index, dtype=np.int64)
+        y_min, y_max, v_min, v_max = self.ranges[index].T
+        i_y = np.floor((y - y_min)/(y_max - y_min)*self.bins).astype(np.int64)
+        i_v = np.floor((v - v_min)/(v_max - v_min)*self.bins).astype(np.int64)
+        inside = (i_y >= 0) & (i_y < self.bins) \
+                & (i_v >= 0) & (i_v < self.bins)
+        keys = (index*self.bins + i_y)*self.bins + i_v
+        self.keys = np.union1d(self.keys, keys[inside])
+        self.n_points += np.bincount(index, minlength=self.N_part)
+
+    def occupied(self) -> np.ndarray:
+        """Number of cells visited by each particle"""
+        return np.bincount(self.keys//self.bins**2, minlength=self.N_part)
+
+    def coverage(self) -> np.ndarray:
+        """Fraction of the allowed area visited by each particle"""
+        return self.occupied()/self.n_allowed
+
+    def filling(self) -> np.ndarray:
+        """Coverage relative to the one of as many points spread uniformly 
+        over the allowed area (1 - exp(-points/cells)), which does not 
+        depend much on the length of the run and on the energy"""
+        expected = 1 - np.exp(-self.n_points/self.n_allowed)
+        return np.where(self.n_points > 0, 
+                        self.coverage()/np.maximum(expected, 1e-300), 0)
+
+    def chaotic(self, filling_c: float = DEFAULT_filling_c) -> np.ndarray:
+        """Classification of the orbits: True for chaotic ones"""
+        return self.filling() > filling_c
+
+def pcs_density(pos_y: np.ndarray,
+                vel_y: np.ndarray,
+                extent: tuple,
+                shape: tuple) -> np.ndarray:
+    """Counts the section points in each cell of a (y, v) grid, e.g. the 
+    pixels of a figure (points outside the extent are ignored)
+    @ params:
+        - pos_y: positions of the points in the PCS along the y axis
+        - vel_y: velocities of the points in the PCS along the y axis
+        - extent: (ymin, ymax, vmin, vmax) of the grid
+        - shape: (number of cells along y, number of cells along v)
+    @ returns:
+        - counts: number of points in each cell, of the given shape
+    """
+    ymin, ymax, vmin, vmax = extent
+    if not (ymax > ymin and vmax > vmin):
+        raise ValueError("The extent of the grid must not be empty")
+    n_y, n_v = shape
+    i = np.floor((pos_y - ymin)/(ymax - ymin)*n_y).astype(np.int64)
+    j = np.floor((vel_y - vmin)/(vmax - vmin)*n_v).astype(np.int64)
+    valid = (i >= 0) & (i < n_y) & (j >= 0) & (j < n_v)
+    counts = np.bincount(i[valid]*n_v + j[valid], minlength=n_y*n_v)
+    return np.reshape(counts, shape)
+
+def load_section(filename: str) -> np.ndarray:
+    """Loads a Poincaré section saved as ASCII (y on the first line, v on the
+    second line). A binary copy (.npy) is written next to the file at the 
+    first call and read afterwards, unless the ASCII file is newer.
+    @ params:
+        - filename: path of the ASCII file
+    @ returns:
+        - section: array [y, v]
+    """
+    binary = os.path.splitext(filename)[0] + ".npy"
+    if os.path.exists(binary) \
+            and os.path.getmtime(binary) >= os.path.getmtime(filename):
+        return np.load(binary, mmap_mode="r")
+    section = np.loadtxt(filename, ndmin=2)
+    np.save(binary, section)
+    return section
+
 def pcs_find_legacy(pos_x, pos_y, vel_x, vel_y):
     """DEPRECIATED - DO NOT USE
     Depreciated legacy function that should not be used
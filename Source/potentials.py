@@ -37,6 +37,182 @@ import numpy as np
 
 MAX_VAL = 1e3
 
+POTENTIALS = {}
+
+def register_potential(name: str):
+    """Decorator adding a Potential subclass to the registry
+    @params:
+        - name: key of the potential in POTENTIALS
+    @returns:
+        - decorator returning the class unchanged
+    """
+    def decorator(cls):
+        cls.name = name
+        POTENTIALS[name] = cls
+        return cls
+    return decorator
+
+def get_potential(name: str, **params):
+    """Builds a registered potential
+    @params:
+        - name: key of the potential in POTENTIALS
+        - params: parameters passed to the potential constructor
+    @returns:
+        - instance of the potential
+    """
+    if name not in POTENTIALS:
+        raise KeyError("Unknown potential '{}', available: {}"
+                       .format(name, ", ".join(POTENTIALS)))
+    return POTENTIALS[name](**params)
+
+def _positions(W_grid: np.ndarray, position_only: bool = False) -> tuple:
+    """Extracts the positions (X, Y) of a phase-space or position vector
+    @params:
+        - W_grid: Phase-space vector (or position vector)
+        - position_only: True if W is np.array([X, Y])
+    @returns:
+        - X, Y: positions, at least 1D
+    """
+    if position_only:
+        X = W_grid[0]
+        Y = W_grid[1]
+    else:
+        X = W_grid[0, 0]
+        Y = W_grid[0, 1]
+    # If X or Y is not an array (or a list), but rather a scalar, then we
+    # create a list of one element so that it can work either way
+    return np.atleast_1d(X), np.atleast_1d(Y)
+
+class Potential:
+    """Base class of the 2D potentials. Subclasses implement value, gradient
+    and hessian; all methods are vectorized over X and Y of any
+    (broadcastable) shape.
+    """
+    name = None
+
+    def value(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+        """Computes the potential V(X, Y)"""
+        raise NotImplementedError
+
+    def gradient(self, X: np.ndarray, Y: np.ndarray) -> tuple:
+        """Computes the gradient (dV/dX, dV/dY)"""
+        raise NotImplementedError
+
+    def hessian(self, X: np.ndarray, Y: np.ndarray) -> tuple:
+        """Computes the hessian (d2V/dX2, d2V/dXdY, d2V/dY2)"""
+        raise NotImplementedError
+
+    def value_gradient(self, X: np.ndarray, Y: np.ndarray) -> tuple:
+        """Computes the potential and its gradient in a single call 
+        (subclasses share the common terms when they can)
+        @returns:
+            - POT, DX, DY
+        """
+        return (self.value(X, Y),) + tuple(self.gradient(X, Y))
+
+    def potential(self, W_grid: np.ndarray, 
+                  position_only: bool = False) -> np.ndarray:
+        """Computes the potential of a phase-space vector (same interface 
+        as hh_potential and kepler_potential).
+        @params:
+            - W_grid: Phase-space vector
+            - position_only: True if W is np.array([X, Y])
+        @returns:
+            - POT: Potential
+        """
+        X, Y = _positions(W_grid, position_only)
+        return self.value(X, Y)
+
+    def energy(self, W: np.ndarray) -> np.ndarray:
+        """Computes the total energy (potential and kinetic) in one pass, 
+        without copying nor reshaping W (see energies.total).
+        @params:
+            - W: Phase-space vector [[x, y], [u, v]], of any trailing shape
+        @returns:
+            - E: Total energy
+        """
+        U = W[1, 0]
+        V = W[1, 1]
+        return self.value(W[0, 0], W[0, 1]) + (U*U + V*V)/2
+
+    def evolution(self, t: np.ndarray, W: np.ndarray) -> np.ndarray:
+        """Computes the evolution from the potential derivative (same 
+        interface as hh_evolution and kepler_evolution).
+        @params
+            - t: Time (not used)
+            - W: Phase space vector
+        @returns 
+            - dot W: Time derivative of the phase space vector
+        """
+        X = W[0, 0]
+        Y = W[0, 1]
+        DU, DV = self.gradient(X, Y)
+        return np.array([[W[1, 0], W[1, 1]], [-DU, -DV]])
+
+@register_potential("kepler")
+class Kepler(Potential):
+    """Kepler potential: V(R) = -G*m1*m2/R (assuming G = 1, m1 = 1, m2 = 1)
+    with the point mass at (x = 0, y = 0).
+    """
+    def value(self, X, Y):
+        return -1/np.sqrt(X**2 + Y**2)
+
+    def gradient(self, X, Y):
+        R3 = np.sqrt(X**2 + Y**2)**3
+        return X/R3, Y/R3
+
+    def hessian(self, X, Y):
+        R2 = X**2 + Y**2
+        R3 = np.sqrt(R2)**3
+        R5 = R3*R2
+        return 1/R3 - 3*X**2/R5, -3*X*Y/R5, 1/R3 - 3*Y**2/R5
+
+    def value_gradient(self, X, Y):
+        INV_R = 1/np.sqrt(X**2 + Y**2)
+        INV_R3 = INV_R**3
+        return -INV_R, X*INV_R3, Y*INV_R3
+
+@register_potential("henon_heiles")
+class HenonHeiles(Potential):
+    """Generalized Hénon-Heiles potential:
+        V(x, y) = (A x^2 + B y^2)/2 + D x^2 y - C y^3/3
+    The classical potential is A = B = C = D = 1. The coefficients can be 
+    arrays: they are broadcast against the positions, so that a parameter 
+    axis of the positions (e.g. W of shape (2, 2, P, N) with coefficients of 
+    shape (P, 1)) sweeps P potentials within a single integration.
+    """
+    def __init__(self, A=1., B=1., C=1., D=1.):
+        self.A = np.asarray(A, dtype=float)
+        self.B = np.asarray(B, dtype=float)
+        self.C = np.asarray(C, dtype=float)
+        self.D = np.asarray(D, dtype=float)
+
+    def value(self, X, Y):
+        return (self.A*X**2 + self.B*Y**2)/2 \
+                + self.D*X**2*Y - self.C*Y**3/3
+
+    def gradient(self, X, Y):
+        return (self.A*X + 2*self.D*X*Y,
+                self.B*Y + self.D*X**2 - self.C*Y**2)
+
+    def hessian(self, X, Y):
+        return (self.A + 2*self.D*Y,
+                2*self.D*X,
+                self.B - 2*self.C*Y)
+
+    def value_gradient(self, X, Y):
+        X2 = X**2
+        Y2 = Y**2
+        DX2 = self.D*X2
+        CY2 = self.C*Y2
+        POT = (self.A*X2 + self.B*Y2)/2 + DX2*Y - CY2*Y/3
+        return (POT,
+                self.A*X + 2*self.D*X*Y,
+                self.B*Y + DX2 - CY2)
+
+KEPLER = Kepler()
+HH = HenonHeiles()
+
 def kepler_potential(W_grid: np.ndarray, 
                      position_only: bool = False) -> np.ndarray:
     """Computes the Kepler potential: V(R) = -G*m1*m2/R 
@@ -48,18 +224,7 @@ def kepler_potential(W_grid: np.ndarray,
     @returns:
         - computed potential
     """
-    if position_only: 
-        X = W_grid[0]
-        Y = W_grid[1]
-    else:
-        X = W_grid[0,0]
-        Y = W_grid[0,1]
-    # If X or Y is not an array (or a list), but rather a scalar, then we
-    # create a list of one element so that it can work either way
-    if np.ndim(X) == 0: X = np.array([X])
-    if np.ndim(Y) == 0: Y = np.array([Y])
-    R = np.sqrt(X**2 + Y**2)
-    return -1/R
+    return KEPLER.potential(W_grid, position_only)
 
 def kepler_evolution(t: np.ndarray, W: np.ndarray):
     """Computes the evolution from the Kepler potential derivative
@@ -69,16 +234,7 @@ def kepler_evolution(t: np.ndarray, W: np.ndarray):
     &returns 
         - dot W: Time derivative of the phase space vector
     """
-    X = W[0 ,0]
-    Y = W[0, 1]
-    U = W[1, 0]
-    V = W[1, 1]
-    R = np.sqrt(X**2 + Y**2)
-    DX = U 
-    DY = V
-    DU = -X/R**3
-    DV = -Y/R**3
-    return np.array([[DX, DY], [DU, DV]])
+    return KEPLER.evolution(t, W)
 
 def hh_potential(W_grid: np.ndarray, 
                  position_only=False) -> np.ndarray:
@@ -89,20 +245,7 @@ def hh_potential(W_grid: np.ndarray,
     @returns:
         - POT: Potential
     """
-    if position_only:
-        X = W_grid[0]
-        Y = W_grid[1]
-    else:
-        X = W_grid[0, 0]
-        Y = W_grid[0, 1]
-        
-    # If X or Y is not an array (or a list), but rather a scalar, then we
-    # create a list of one element so that it can work either way
-    if np.ndim(X) == 0: X = np.array([X])
-    if np.ndim(Y) == 0: Y = np.array([Y])
-
-    POT = (X**2 + Y**2 + 2*X**2*Y - 2*Y**3/3)/2
-    return POT        
+    return HH.potential(W_grid, position_only)
 
 def hh_evolution(t: np.ndarray, W: np.ndarray):
     """Computes the evolution from the HH potential derivative
@@ -112,12 +255,4 @@ def hh_evolution(t: np.ndarray, W: np.ndarray):
     &returns 
         - dot W: Time derivative of the phase space vector
     """
-    X = W[0 ,0]
-    Y = W[0, 1]
-    U = W[1, 0]
-    V = W[1, 1]
-    DX = U 
-    DY = V
-    DU = -(2*X*Y + X)
-    DV = -(X**2 - Y**2 + Y)
-    return np.array([[DX, DY], [DU, DV]])
+    return HH.evolution(t, W)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Regularization
+
+Levi-Civita regularization of the Kepler problem (2D KS transformation), to
+integrate eccentric orbits through their pericentre with a fixed step.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+regularization.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+import integrator as itg
+
+def to_levi_civita(W: np.ndarray, t0: float = 0) -> np.ndarray:
+    """Transforms a phase-space vector into Levi-Civita coordinates, with 
+    x + iy = (u1 + iu2)^2 and the fictitious time s such that dt = r ds.
+    @params:
+        - W: phase-space vector [[x, y], [u, v]]
+        - t0: physical time of W
+    @returns:
+        - W_reg: regularized state [[u1, u2], [u1', u2'], [t, E]] where ' is 
+          the derivative with respect to s and E the (constant) energy
+    """
+    X = W[0, 0]
+    Y = W[0, 1]
+    U = W[1, 0]
+    V = W[1, 1]
+    R = np.sqrt(X**2 + Y**2)
+    E = (U**2 + V**2)/2 - 1/R
+    # Square root of x + iy, on the branch that avoids dividing by ~0
+    pos = X >= 0
+    SIGN = np.where(Y < 0, -1, 1)
+    A = np.sqrt((R + np.abs(X))/2)
+    B = Y/(2*A)
+    U1 = np.where(pos, A, SIGN*B)
+    U2 = np.where(pos, B, SIGN*A)
+    # u' = (u + iv) * conj(u1 + iu2) / 2
+    P1 = (U*U1 + V*U2)/2
+    P2 = (V*U1 - U*U2)/2
+    T = np.zeros_like(E) + t0
+    return np.array([[U1, U2], [P1, P2], [T, E]])
+
+def from_levi_civita(W_reg: np.ndarray) -> tuple:
+    """Transforms a regularized state back to physical coordinates
+    @params:
+        - W_reg: regularized state [[u1, u2], [u1', u2'], [t, E]]
+    @returns:
+        - t, W: physical time and phase-space vector [[x, y], [u, v]]
+    """
+    U1 = W_reg[0, 0]
+    U2 = W_reg[0, 1]
+    P1 = W_reg[1, 0]
+    P2 = W_reg[1, 1]
+    T = W_reg[2, 0]
+    R = U1**2 + U2**2
+    X = U1**2 - U2**2
+    Y = 2*U1*U2
+    U = 2*(U1*P1 - U2*P2)/R
+    V = 2*(U1*P2 + U2*P1)/R
+    return T, np.array([[X, Y], [U, V]])
+
+def levi_civita_evolution(s: np.ndarray, W_reg: np.ndarray) -> np.ndarray:
+    """Computes the evolution of the regularized Kepler problem: a harmonic
+    oscillator u'' = E/2 u, with t' = r = |u|^2
+    @params
+        - s: Fictitious time (not used)
+        - W_reg: regularized state [[u1, u2], [u1', u2'], [t, E]]
+    @returns 
+        - W_reg': Derivative of the regularized state with respect to s
+    """
+    U1 = W_reg[0, 0]
+    U2 = W_reg[0, 1]
+    E = W_reg[2, 1]
+    return np.array([[W_reg[1, 0], W_reg[1, 1]],
+                     [E/2*U1, E/2*U2],
+                     [U1**2 + U2**2, np.zeros_like(E)]])
+
+def fictitious_step(W0: np.ndarray, N_orbit: int = 100) -> float:
+    """Fictitious time step giving (at least) N_orbit steps per orbit. A bound
+    orbit lasts pi/omega in s, with omega^2 = -E/2, whatever its eccentricity.
+    @params:
+        - W0: initial phase-space vector(s) [[x, y], [u, v]]
+        - N_orbit: number of steps per orbit
+    @returns:
+        - h: fictitious time step
+    """
+    E = to_levi_civita(W0)[2, 1]
+    if np.any(E >= 0):
+        raise ValueError("Only bound orbits (E < 0) have a finite period")
+    omega = np.sqrt(-np.asarray(E)/2)
+    return np.pi/np.max(omega)/N_orbit
+
+def kepler_regularized(t0: float,
+                       W0: np.ndarray,
+                       h: float,
+                       n: int,
+                       integrator = itg.rk4):
+    """Integrates the Kepler problem in Levi-Civita coordinates with a fixed 
+    fictitious time step, and converts the result back to physical time.
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]]
+        - h: fictitious step size (see fictitious_step)
+        - n: number of steps
+        - integrator: integrator used in the fictitious time
+    @returns: 
+        - t, W: physical time and state (solution) arrays; t has the shape 
+          of the particle axes since each particle has its own time
+    """
+    W_reg0 = to_levi_civita(W0, t0)
+    s, W_reg = itg.integrator_type(0, W_reg0, h, n, 
+                                   levi_civita_evolution, integrator)
+    time, W = from_levi_civita(np.moveaxis(W_reg, 0, -1))
+    return np.moveaxis(time, -1, 0), np.moveaxis(W, -1, 0)
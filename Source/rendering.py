@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Rendering
+
+Aggregated (rasterized) rendering of large point clouds, such as Poincaré 
+sections: points are binned on the pixel grid of the axes and shaded with the 
+logarithm of their density.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+rendering.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgba
+
+import poincare_sections as pcs
+
+def axes_pixels(ax, dpi: float = None) -> tuple:
+    """Size of the axes in pixels once saved with a given resolution
+    @params:
+        - ax: the axes
+        - dpi: resolution of the saved figure (savefig.dpi if None)
+    @returns:
+        - (width, height) in pixels
+    """
+    if dpi is None:
+        dpi = plt.rcParams["savefig.dpi"]
+    if dpi == "figure":
+        dpi = ax.figure.dpi
+    bbox = ax.get_window_extent()
+    scale = dpi/ax.figure.dpi
+    return max(int(bbox.width*scale), 1), max(int(bbox.height*scale), 1)
+
+def plot_density(ax, 
+                 x: np.ndarray, 
+                 y: np.ndarray, 
+                 window: tuple = None, 
+                 color: str = "C3",
+                 dpi: float = None,
+                 label: str = None):
+    """Draws a point cloud as an image of its density (log shading, the 
+    transparency going from 0 for empty pixels to 1 for the densest ones).
+    The cost depends on the number of pixels rather than of points.
+    @params:
+        - ax: the axes
+        - x, y: coordinates of the points
+        - window: (xmin, xmax, ymin, ymax) of the plot, only the points 
+          inside are binned (full extent of the points if None, limits of 
+          the axes if there are no points or along an axis where all the 
+          points are at the same value)
+        - color: color of the points
+        - dpi: resolution of the saved figure (savefig.dpi if None)
+        - label: label of the points in the legend
+    @returns:
+        - the image
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if window is None and len(x) == 0:
+        window = ax.get_xlim() + ax.get_ylim()
+    elif window is None:
+        window = (np.min(x), np.max(x), np.min(y), np.max(y))
+        dx = (window[1] - window[0])*0.02
+        dy = (window[3] - window[2])*0.02
+        # Degenerate extent: as wide as the limits of the axes
+        if dx == 0:
+            dx = np.diff(ax.get_xlim())[0]/2
+        if dy == 0:
+            dy = np.diff(ax.get_ylim())[0]/2
+        window = (window[0] - dx, window[1] + dx, 
+                  window[2] - dy, window[3] + dy)
+    width, height = axes_pixels(ax, dpi)
+    counts = pcs.pcs_density(x, y, window, (width, height))
+    shade = np.log1p(counts).T
+    shade = shade/max(np.max(shade), 1)
+    image = np.zeros(np.shape(shade) + (4,))
+    image[..., :3] = to_rgba(color)[:3]
+    image[..., 3] = shade
+    img = ax.imshow(image, origin="lower", extent=window, 
+                    aspect="auto", interpolation="nearest")
+    ax.set_xlim(window[0], window[1])
+    ax.set_ylim(window[2], window[3])
+    if label is not None:
+        ax.scatter([], [], s=1, color=color, marker="s", label=label)
+    return img
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+"""
+Section Index
+
+Spatial index (uniform cell list) over the Poincaré section points, with 
+batched radius and k-nearest-neighbour queries, and the analyses built on it 
+in near-linear time: nearest-neighbour distances, islands (connected 
+components) and island chains of each orbit, and box-counting dimension.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+section_index.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+import poincare_sections as pcs
+
+BATCH = 2**16 # queries processed at once (bounds the candidate pairs)
+N_SIZES = 8 # number of box sizes of the box-counting dimension
+DENSE_FACTOR = 8 # dense cell table if at most DENSE_FACTOR cells per point
+
+class CellList:
+    """Uniform cell list over 2D points (e.g. (y, v) section points): the 
+    points are sorted by cell, and the points of a cell are a contiguous 
+    range, so that the neighbours of a batch of queries are found from the 
+    surrounding cells only.
+    @ params:
+        - points: coordinates, shape (2, M)
+        - cell: size of the cells (typically the query radius); by default,
+          about 2 points per cell
+    """
+    def __init__(self, points: np.ndarray, cell: float = None):
+        self.points = np.asarray(points, dtype=float)
+        M = self.points.shape[1]
+        self.low = np.min(self.points, axis=1) if M > 0 else np.zeros(2)
+        high = np.max(self.points, axis=1) if M > 0 else np.ones(2)
+        if cell is None:
+            # About 2 points per cell whether the points fill an area or lie
+            # on a line; coincident points all go in one cell
+            extent = high - self.low
+            largest = np.max(extent)
+            cell = max(np.sqrt(np.prod(extent)*2/max(M, 1)), 
+                       largest*2/max(M, 1))
+            if not cell > 0:
+                cell = 1.
+        self.cell = float(cell)
+        self.shape = np.floor((high - self.low)/self.cell).astype(np.int64) + 1
+        key = self._keys(self._cells(self.points))
+        self.order = np.argsort(key, kind="stable")
+        self.sorted_keys = key[self.order]
+        self.sorted_points = self.points[:, self.order]
+        # Start of each cell in the sorted points (if not too many cells)
+        N_cells = int(np.prod(self.shape))
+        self.table = None
+        if N_cells <= DENSE_FACTOR*M + 1024:
+            self.table = np.searchsorted(self.sorted_keys, 
+                                         np.arange(N_cells + 1))
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        return np.floor((points - self.low[:, np.newaxis])
+                        /self.cell).astype(np.int64)
+
+    def _keys(self, cells: np.ndarray) -> np.ndarray:
+        return cells[0]*self.shape[1] + cells[1]
+
+    def _ranges(self, key: np.ndarray) -> tuple:
+        """Range [start, end) of the sorted points of each cell"""
+        if self.table is not None:
+            return self.table[key], self.table[key + 1]
+        return np.searchsorted(self.sorted_keys, key, side="left"), \
+                np.searchsorted(self.sorted_keys, key, side="right")
+
+    def _candidates(self, queries: np.ndarray, reach: int) -> tuple:
+        """Pairs (query, point) of the points in the cells at most reach 
+        cells away from the cell of each query, ordered by query
+        @ returns:
+            - i: index of the query
+            - j: index of the point (in the sorted order)
+        """
+        cells = self._cells(queries)
+        offset = np.arange(-reach, reach + 1)
+        cx = cells[0][:, np.newaxis, np.newaxis] \
+                + offset[np.newaxis, :, np.newaxis]
+        cy = cells[1][:, np.newaxis, np.newaxis] \
+                + offset[np.newaxis, np.newaxis, :]
+        valid = (cx >= 0) & (cx < self.shape[0]) \
+                & (cy >= 0) & (cy < self.shape[1])
+        key = np.where(valid, cx*self.shape[1] + cy, 0).reshape(len(cells[0]), 
+                                                                -1)
+        start, end = self._ranges(key)
+        count = np.where(valid.reshape(key.shape), end - start, 0).ravel()
+        i = np.repeat(np.arange(len(cells[0])), 
+                      np.sum(count.reshape(key.shape), axis=1))
+        # Position of each pair within the range of its cell
+        position = np.arange(len(i)) - np.repeat(np.cumsum(count) - count, 
+                                                 count)
+        return i, np.repeat(start.ravel(), count) + position
+
+    def query_radius(self, queries: np.ndarray, r: float) -> tuple:
+        """All the pairs (query, point) closer than r
+        @ params:
+            - queries: coordinates, shape (2, Q)
+            - r: radius
+        @ returns:
+            - i: index of the query
+            - j: index of the point (in self.points)
+            - d: distance
+        """
+        queries = np.asarray(queries, dtype=float)
+        reach = int(np.ceil(r/self.cell))
+        i_all = [np.zeros(0, dtype=np.int64)]
+        j_all = [np.zeros(0, dtype=np.int64)]
+        d_all = [np.zeros(0)]
+        for start in range(0, queries.shape[1], BATCH):
+            q = queries[:, start:start+BATCH]
+            i, j = self._candidates(q, reach)
+            d = np.hypot(q[0, i] - self.sorted_points[0, j], 
+                         q[1, i] - self.sorted_points[1, j])
+            close = d <= r
+            i_all.append(i[close] + start)
+            j_all.append(self.order[j[close]])
+            d_all.append(d[close])
+        return np.concatenate(i_all), np.concatenate(j_all), \
+                np.concatenate(d_all)
+
+    def query_knn(self, queries: np.ndarray, k: int = 1) -> tuple:
+        """The k nearest points of each query: the surrounding cells are 
+        searched with a growing reach until the k nearest points are closer
+        than the searched distance
+        @ params:
+            - queries: coordinates, shape (2, Q)
+            - k: number of neighbours (at most the number of points)
+        @ returns:
+            - d: distances, shape (Q, k), increasing
+            - j: indices of the points (in self.points), shape (Q, k)
+        """
+        queries = np.asarray(queries, dtype=float)
+        Q = queries.shape[1]
+        k = min(k, self.points.shape[1])
+        d_knn = np.full((Q, k), np.inf)
+        j_knn = np.full((Q, k), -1, dtype=np.int64)
+        if k == 0:
+            return d_knn, j_knn
+        # Queries outside of the grid start at the grid, and all the cells
+        # are searched at the full reach
+        cells = self._cells(queries)
+        last = (self.shape - 1)[:, np.newaxis]
+        outside = np.max(np.maximum(np.maximum(-cells, cells - last), 0), 
+                         axis=0)
+        full = np.max(np.maximum(np.abs(cells), np.abs(last - cells)), axis=0)
+        reach = np.maximum(outside + 1, 1)
+        todo = np.arange(Q)
+        while len(todo) > 0:
+            done = np.zeros(Q, dtype=bool)
+            for value in np.unique(reach[todo]):
+                group = todo[reach[todo] == value]
+                for start in range(0, len(group), BATCH):
+                    batch = group[start:start+BATCH]
+                    self._knn_batch(queries, batch, value, k, full, 
+                                    d_knn, j_knn, done)
+            todo = todo[~done[todo]]
+            # Once k points are found, the next search reaches all the 
+            # points as close as the k-th one, otherwise the reach doubles
+            d_k = d_knn[todo, -1]
+            grown = np.where(np.isfinite(d_k), 
+                             np.ceil(np.minimum(d_k/self.cell, full[todo])) + 1,
+                             2*reach[todo])
+            reach[todo] = np.minimum(np.maximum(grown, reach[todo] + 1), 
+                                     np.maximum(full[todo], 1))
+        return d_knn, j_knn
+
+    def _knn_batch(self, queries: np.ndarray, batch: np.ndarray, reach: int, 
+                   k: int, full: np.ndarray, d_knn: np.ndarray, 
+                   j_knn: np.ndarray, done: np.ndarray):
+        """One search of query_knn, for a batch of queries at a given reach
+        (fills d_knn and j_knn, and done for the queries found)"""
+        q = queries[:, batch]
+        i, j = self._candidates(q, reach)
+        d = np.hypot(q[0, i] - self.sorted_points[0, j], 
+                     q[1, i] - self.sorted_points[1, j])
+        # Sort by distance within each query
+        order = np.lexsort((d, i))
+        i, j, d = i[order], j[order], d[order]
+        count = np.bincount(i, minlength=len(batch))
+        rank = np.arange(len(i)) - np.repeat(np.cumsum(count) - count, count)
+        keep = rank < k
+        d_batch = np.full((len(batch), k), np.inf)
+        j_batch = np.full((len(batch), k), -1, dtype=np.int64)
+        d_batch[i[keep], rank[keep]] = d[keep]
+        j_batch[i[keep], rank[keep]] = self.order[j[keep]]
+        # All the points closer than (reach - 1) cells plus the distance of
+        # the query to the border of its cell have been searched
+        frac = (q - self.low[:, np.newaxis])/self.cell
+        frac = frac - np.floor(frac)
+        border = np.min(np.minimum(frac, 1 - frac), axis=0)
+        safe = (reach - 1 + border)*self.cell
+        d_knn[batch] = d_batch
+        j_knn[batch] = j_batch
+        done[batch] = (d_batch[:, -1] <= safe) | (reach >= full[batch])
+
+def index_section(filename: str, cell: float = None) -> CellList:
+    """Index of a Poincaré section saved as ASCII (see pcs.load_section)
+    @ params:
+        - filename: path of the ASCII file
+        - cell: size of the cells (see CellList)
+    @ returns:
+        - index: cell list over the points [y, v] of the section
+    """
+    return CellList(pcs.load_section(filename), cell)
+
+def nearest_neighbour_distance(points: np.ndarray) -> np.ndarray:
+    """Distance of each point to its nearest neighbour (other than itself, 
+    inf if there is no other point)
+    @ params:
+        - points: coordinates, shape (2, M)
+    """
+    if np.shape(points)[1] < 2:
+        return np.full(np.shape(points)[1], np.inf)
+    index = CellList(points)
+    d, j = index.query_knn(points, k=2)
+    return d[:, 1]
+
+def connected_components(N: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Connected components of a graph of N nodes and edges (i, j), by 
+    label propagation with pointer jumping (vectorized union-find)
+    @ returns:
+        - labels: smallest node of the component of each node
+    """
+    labels = np.arange(N)
+    while True:
+        old = labels.copy()
+        low = np.minimum(labels[i], labels[j])
+        np.minimum.at(labels, i, low)
+        np.minimum.at(labels, j, low)
+        # Pointer jumping: each node takes the label of its label
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, old):
+            return labels
+
+def islands(points: np.ndarray, r: float, 
+            particle: np.ndarray = None) -> tuple:
+    """Islands of section points: groups of points connected by steps 
+    shorter than r (and of the same particle if given)
+    @ params:
+        - points: coordinates, shape (2, M)
+        - r: linking distance (a few times the typical nearest-neighbour 
+          distance)
+        - particle: particle (orbit) of each point
+    @ returns:
+        - labels: island of each point (0, 1, ...)
+        - sizes: number of points of each island
+    """
+    M = np.shape(points)[1]
+    i, j, d = CellList(points, cell=r).query_radius(points, r)
+    if particle is not None:
+        same = particle[i] == particle[j]
+        i, j = i[same], j[same]
+    labels = np.unique(connected_components(M, i, j), 
+                       return_inverse=True)[1]
+    return labels, np.bincount(labels)
+
+def island_chains(points: np.ndarray, particle: np.ndarray, 
+                  r: float) -> np.ndarray:
+    """Number of islands of the section of each orbit: a regular orbit 
+    around a resonance traces a chain of several islands, other regular 
+    orbits a single curve
+    @ params:
+        - points: coordinates, shape (2, M)
+        - particle: particle (orbit) of each point, from 0 to N-1
+        - r: linking distance (see islands)
+    @ returns:
+        - N_islands: number of islands of each particle
+    """
+    labels, sizes = islands(points, r, particle)
+    # Particle of each island
+    owner = np.zeros(len(sizes), dtype=np.int64)
+    owner[labels] = particle
+    return np.bincount(owner, minlength=np.max(particle) + 1)
+
+def box_counting(points: np.ndarray, sizes: np.ndarray = None) -> tuple:
+    """Box-counting dimension of a set of points
+    @ params:
+        - points: coordinates, shape (2, M)
+        - sizes: box sizes (by default N_SIZES sizes from the extent of the 
+          points down to a few typical point spacings)
+    @ returns:
+        - sizes: box sizes
+        - counts: number of boxes containing points, for each size
+        - dimension: slope of log(counts) against log(1/sizes)
+    """
+    points = np.asarray(points, dtype=float)
+    low = np.min(points, axis=1)
+    extent = np.max(np.max(points, axis=1) - low)
+    if sizes is None:
+        spacing = extent/np.sqrt(points.shape[1])
+        sizes = np.geomspace(extent/4, 4*spacing, N_SIZES)
+    counts = np.zeros(len(sizes), dtype=np.int64)
+    for k, size in enumerate(sizes):
+        cells = np.floor((points - low[:, np.newaxis])/size).astype(np.int64)
+        n_y = np.max(cells[1]) + 1
+        counts[k] = len(np.unique(cells[0]*n_y + cells[1]))
+    dimension = np.polyfit(np.log(1/sizes), np.log(counts), 1)[0]
+    return sizes, counts, dimension
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Taylor Integrator
+
+Taylor series integrator for the (generalized) Hénon-Heiles potential: its 
+force is a quadratic polynomial, so the Taylor coefficients of the solution 
+are given by a recurrence with Cauchy products. The order and the step size 
+are chosen from the decay of the coefficients.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+taylor.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import numpy as np
+
+import potentials as pot
+import integrator as itg
+
+DEFAULT_tol = 1e-16
+DEFAULT_order = 20
+
+def taylor_order(tol: float = DEFAULT_tol) -> int:
+    """Order of the series for a given tolerance (Jorba & Zou 2005)
+    @ params
+        - tol: relative tolerance
+    @returns: 
+        - order
+    """
+    return int(np.ceil(-np.log(tol)/2)) + 1
+
+def taylor_coefficients(w: np.ndarray, 
+                        order: int, 
+                        potential: pot.HenonHeiles = pot.HH) -> np.ndarray:
+    """Taylor coefficients of the solution of the Hénon-Heiles equations
+        x' = u, y' = v, u' = -(A x + 2D xy), v' = -(B y + D x^2 - C y^2)
+    @ params
+        - w: state vector [[x, y], [u, v]]
+        - order: order of the series
+        - potential: Hénon-Heiles potential (coefficients A, B, C, D)
+    @returns: 
+        - coefficients of shape (order + 1,) + shape(w)
+    """
+    A = potential.A
+    B = potential.B
+    C = potential.C
+    D = potential.D
+    coef = np.zeros((order + 1,) + np.shape(w))
+    coef[0] = w
+    X = coef[:, 0, 0]
+    Y = coef[:, 0, 1]
+    U = coef[:, 1, 0]
+    V = coef[:, 1, 1]
+    for k in range(order):
+        # Cauchy products: (fg)_k = sum_j f_j g_(k-j)
+        XY = np.sum(X[:k+1]*Y[k::-1], axis=0)
+        XX = np.sum(X[:k+1]*X[k::-1], axis=0)
+        YY = np.sum(Y[:k+1]*Y[k::-1], axis=0)
+        X[k+1] = U[k]/(k + 1)
+        Y[k+1] = V[k]/(k + 1)
+        U[k+1] = -(A*X[k] + 2*D*XY)/(k + 1)
+        V[k+1] = -(B*Y[k] + D*XX - C*YY)/(k + 1)
+    return coef
+
+def taylor_step_size(coef: np.ndarray, tol: float = DEFAULT_tol) -> float:
+    """Step size for which the last two terms of the series are below the 
+    tolerance, for all the particles
+    @ params
+        - coef: Taylor coefficients (see taylor_coefficients)
+        - tol: relative tolerance
+    @returns: 
+        - h: step size
+    """
+    order = len(coef) - 1
+    norm = np.max(np.abs(coef), axis=(1, 2))
+    eps = tol*np.maximum(norm[0], 1)
+    rho = np.minimum((eps/norm[order-1])**(1/(order - 1)), 
+                     (eps/norm[order])**(1/order))
+    return np.min(rho)
+
+def taylor_eval(coef: np.ndarray, h: float) -> np.ndarray:
+    """Evaluates the series at t + h (Horner scheme)"""
+    w = coef[-1]
+    for k in range(len(coef) - 2, -1, -1):
+        w = coef[k] + h*w
+    return w
+
+def taylor_step(t: float, w: np.ndarray, h: float, func = None, 
+                order: int = DEFAULT_order,
+                potential: pot.HenonHeiles = pot.HH) -> np.ndarray:
+    """One step of the Taylor method (see integrator.euler_step; func is 
+    only used to find the Hénon-Heiles potential)"""
+    if func is not None:
+        potential = _hh_potential(func)
+    return taylor_eval(taylor_coefficients(w, order, potential), h)
+
+def _hh_potential(func) -> pot.HenonHeiles:
+    """Finds the Hénon-Heiles potential of an evolution function"""
+    if func is pot.hh_evolution:
+        return pot.HH
+    if isinstance(getattr(func, "__self__", None), pot.HenonHeiles):
+        return func.__self__
+    raise ValueError("The Taylor integrator only handles Hénon-Heiles "
+                     "potentials (hh_evolution or HenonHeiles.evolution)")
+
+def taylor(t0: float, 
+           W0: np.ndarray, 
+           h: float, 
+           n: int, 
+           func = pot.hh_evolution,
+           tol: float = DEFAULT_tol,
+           order: int = None,
+           stride: int = 1,
+           t_out: np.ndarray = None):
+    """Taylor method adapted for state vector [[x, y], [u, v]]
+    @ params
+        - t0: initial time value
+        - W0: initial state vector [[x, y], [u, v]]
+        - h: step size (time step) of the output
+        - n: number of steps
+        - func: RHS of differential equation, pot.hh_evolution or the 
+          evolution method of a pot.HenonHeiles
+        - tol: relative tolerance; if given, each step h is done with the
+          substeps given by the decay of the coefficients (shared by all the 
+          particles), otherwise with a single step
+        - order: order of the series (from the tolerance if None)
+        - stride: number of steps between two saved states
+        - t_out: times of the saved states (the closest steps), instead of
+          stride
+    @returns: 
+        - t, W: time and state (solution) arrays
+    """
+    potential = _hh_potential(func)
+    if order is None:
+        order = DEFAULT_order if tol is None else taylor_order(tol)
+    steps = itg.output_steps(t0, h, n, stride, t_out)
+    time = np.zeros(len(steps))
+    W = np.zeros((len(steps),) + np.shape(W0))
+    j = 0
+
+    t = t0
+    w = W0
+    for i in range(n):
+        t_end = t0 + (i + 1)*h
+        if tol is None:
+            w = taylor_eval(taylor_coefficients(w, order, potential), h)
+        else:
+            while t_end - t > 1e-12*h:
+                coef = taylor_coefficients(w, order, potential)
+                h_sub = min(taylor_step_size(coef, tol), t_end - t)
+                w = taylor_eval(coef, h_sub)
+                t = t + h_sub
+        t = t_end
+
+        if j < len(steps) and i + 1 == steps[j]:
+            time[j] = t
+            W[j] = w
+            j += 1
+            if j == len(steps):
+                break
+    return time, W
+
+itg.STEPS[taylor] = taylor_step
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+"""
+Telemetry
+
+Progress of the long runs: steps per second, particle-steps per second, 
+estimated time of arrival, active particles and memory, reported at a bounded 
+rate on stderr or in a JSON-lines file. A monitor aggregates the reports of 
+the workers of a process pool, and can serve the status on a local HTTP 
+endpoint.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+telemetry.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+
+INTERVAL = 1.0 # s, minimum time between two reports
+HOST = "127.0.0.1"
+
+def memory_usage() -> int:
+    """Resident memory of the process (bytes), or its peak if the current 
+    value is not available"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1])*os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kiB on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak*1024
+
+def format_record(record: dict) -> str:
+    """One-line summary of a report"""
+    text = "[{}] {:d}".format(record["name"], record["steps"])
+    if record["total"]:
+        text += "/{:d} ({:.0%})".format(record["total"], 
+                                        record["steps"]/record["total"])
+    text += " | {:.3g} steps/s | {:.3g} part-steps/s | {:d} active"\
+            .format(record["steps_per_s"], record["particle_steps_per_s"],
+                    record["active"])
+    text += " | {:.0f} MB".format(record["memory"]/2**20)
+    if record["eta"] is not None:
+        text += " | ETA {:.0f} s".format(record["eta"])
+    return text
+
+def _write(output, record: dict):
+    """Writes a report on stderr (output None) or in a JSON-lines file"""
+    if output is None:
+        print(format_record(record), file=sys.stderr, flush=True)
+    else:
+        with open(output, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+class Progress:
+    """Progress of a run, updated from the integration loop
+    @ params:
+        - total: total number of steps (no ETA if None)
+        - name: name of the run
+        - output: JSON-lines file, stderr if None
+        - interval: minimum time between two reports (s)
+        - sink: object with a put method (e.g. the queue of a Monitor) that
+          receives the reports instead of the output
+    """
+    def __init__(self, total: int = None, name: str = "run", 
+                 output: str = None, interval: float = INTERVAL, sink = None):
+        self.total = total
+        self.name = name
+        self.output = output
+        self.interval = interval
+        self.sink = sink
+        self.steps = 0
+        self.particle_steps = 0
+        self.active = 0
+        self.start = time.perf_counter()
+        self.last = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self, steps: int, N_part: int):
+        """Adds steps integrated with N_part active particles"""
+        self.steps += steps
+        self.particle_steps += steps*N_part
+        self.active = N_part
+        now = time.perf_counter()
+        if self.last is None or now - self.last >= self.interval:
+            self.emit(now)
+
+    def record(self, now: float = None) -> dict:
+        if now is None:
+            now = time.perf_counter()
+        elapsed = max(now - self.start, 1e-12)
+        steps_per_s = self.steps/elapsed
+        eta = None
+        if self.total and steps_per_s > 0:
+            eta = max(self.total - self.steps, 0)/steps_per_s
+        return {"name": self.name,
+                "pid": os.getpid(),
+                "time": time.time(),
+                "elapsed": elapsed,
+                "steps": self.steps,
+                "total": self.total,
+                "particle_steps": self.particle_steps,
+                "steps_per_s": steps_per_s,
+                "particle_steps_per_s": self.particle_steps/elapsed,
+                "active": self.active,
+                "memory": memory_usage(),
+                "eta": eta}
+
+    def emit(self, now: float = None):
+        self.last = time.perf_counter() if now is None else now
+        record = self.record(self.last)
+        if self.sink is not None:
+            self.sink.put(record)
+        else:
+            _write(self.output, record)
+
+    def close(self):
+        """Final report"""
+        self.active = 0
+        self.emit()
+
+class Monitor:
+    """Aggregates the reports of several Progress (e.g. in the workers of a
+    process pool, with sink=monitor.queue) and reports the sum at a bounded
+    rate
+    @ params:
+        - total: total number of steps of all the workers (for the ETA)
+        - name: name of the run
+        - output: JSON-lines file, stderr if None
+        - interval: minimum time between two reports (s)
+        - port: if given, the status is served on http://127.0.0.1:port/
+        - queue: queue of the reports (a multiprocessing.Manager().Queue() 
+          for process pools), created if None
+    """
+    def __init__(self, total: int = None, name: str = "run", 
+                 output: str = None, interval: float = INTERVAL, 
+                 port: int = None, queue = None):
+        if queue is None:
+            import multiprocessing
+            self._manager = multiprocessing.Manager()
+            queue = self._manager.Queue()
+        else:
+            self._manager = None
+        self.queue = queue
+        self.total = total
+        self.name = name
+        self.output = output
+        self.interval = interval
+        self.port = port
+        self.records = {}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._loop = None
+        self._error = None
+
+    def __enter__(self):
+        self.start_threads()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def put(self, record: dict):
+        """Adds a report (from the same process)"""
+        with self._lock:
+            self.records[(record["pid"], record["name"])] = record
+
+    def status(self) -> dict:
+        """Sum of the last reports of all the workers"""
+        with self._lock:
+            records = list(self.records.values())
+        elapsed = time.perf_counter() - self.start
+        steps = sum(r["steps"] for r in records)
+        # The rates of the finished workers are not counted
+        running = [r for r in records if r["active"] > 0]
+        steps_per_s = sum(r["steps_per_s"] for r in running)
+        total = self.total
+        if total is None and records and all(r["total"] for r in records):
+            total = sum(r["total"] for r in records)
+        eta = None
+        if total and steps_per_s > 0:
+            eta = max(total - steps, 0)/steps_per_s
+        return {"name": self.name,
+                "pid": os.getpid(),
+                "time": time.time(),
+                "elapsed": elapsed,
+                "workers": len(running),
+                "steps": steps,
+                "total": total,
+                "particle_steps": sum(r["particle_steps"] for r in records),
+                "steps_per_s": steps_per_s,
+                "particle_steps_per_s": sum(r["particle_steps_per_s"] 
+                                            for r in running),
+                "active": sum(r["active"] for r in running),
+                "memory": sum(r["memory"] for r in running) 
+                          + memory_usage(),
+                "eta": eta}
+
+    def _collect(self):
+        """Reads the queue and reports (thread)"""
+        last = 0
+        while True:
+            try:
+                record = self.queue.get(timeout=self.interval)
+            except Exception: # queue.Empty
+                record = None
+            if record == "stop":
+                break
+            if record is not None:
+                self.put(record)
+            now = time.perf_counter()
+            if now - last >= self.interval and self.records:
+                _write(self.output, self.status())
+                last = now
+        _write(self.output, self.status())
+
+    def _serve(self):
+        """HTTP status endpoint (thread)"""
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, 
+                    asyncio.LimitOverrunError):
+                pass
+            body = json.dumps(self.status()).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Content-Type: application/json\r\n"
+                         + "Content-Length: {}\r\n".format(len(body))
+                                                   .encode()
+                         + b"Connection: close\r\n\r\n" + body)
+            await writer.drain()
+            writer.close()
+
+        self._loop = asyncio.new_event_loop()
+        try:
+            server = self._loop.run_until_complete(
+                asyncio.start_server(handle, HOST, self.port))
+        except OSError as error: # e.g. port already in use
+            self._error = error
+            self._loop.close()
+            self._loop = None
+            return
+        finally:
+            self._ready.set()
+        self._loop.run_forever()
+        server.close()
+        self._loop.run_until_complete(server.wait_closed())
+        self._loop.close()
+
+    def start_threads(self):
+        thread = threading.Thread(target=self._collect, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        if self.port is not None:
+            self._ready = threading.Event()
+            thread = threading.Thread(target=self._serve, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            self._ready.wait()
+            if self._error is not None:
+                # The run goes on without the endpoint
+                print("{}: no status endpoint on port {} ({})".format(
+                    self.name, self.port, self._error), file=sys.stderr)
+
+    def stop(self):
+        self.queue.put("stop")
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._manager is not None:
+            self._manager.shutdown()
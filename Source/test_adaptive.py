@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Test: Adaptive integrators
+
+Runs the adaptive high-order integrators at tight tolerances on an 
+eccentric Kepler orbit (against the analytical solution), and the Taylor 
+integrator (which only handles the Hénon-Heiles field) on a Hénon-Heiles 
+orbit (against a reference solution).
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+test_adaptive.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import sys
+import numpy as np
+
+import potentials as pot
+import integrator as itg
+import high_order as ho
+import taylor as tay
+
+# parameters
+t0 = 0
+h = 0.5
+n = 20
+e = 0.9 # eccentricity of the Kepler orbit (semi-major axis 1)
+W0_kepler = np.array([[1 - e, 0], [0, np.sqrt((1 + e)/(1 - e))]])
+W0_hh = np.array([[0, 0.1], [0.45, 0.1]])
+h_hh = 0.1
+n_hh = 200
+
+# (name, integrator, options, tolerance of the final state)
+KEPLER_CASES = [("DOP853", ho.dop853, {"rtol": 1e-12}, 1e-8),
+                ("Gauss-Radau", ho.gauss_radau, {"eps": 1e-12}, 1e-8),
+                ("Bulirsch-Stoer", ho.bulirsch_stoer, {"rtol": 1e-12}, 1e-8),
+                ("Bulirsch-Stoer (1e-14)", ho.bulirsch_stoer, 
+                 {"rtol": 1e-14}, 1e-8)]
+HH_CASES = [("Taylor", tay.taylor, {"tol": 1e-16}, 1e-10),
+            ("Taylor (order 10)", tay.taylor, {"order": 10}, 1e-8)]
+
+def kepler_error(integrator, options: dict) -> float:
+    """Largest error over the orbit against the analytical solution"""
+    time, W = integrator(t0, W0_kepler, h, n, pot.kepler_evolution, 
+                         **options)
+    time_ref, W_ref = itg.kepler_eccentric(t0, W0_kepler, h, n)
+    return np.max(np.abs(W - W_ref))
+
+def hh_error(integrator, options: dict) -> float:
+    """Largest error over the orbit against a reference solution"""
+    time, W = integrator(t0, W0_hh, h_hh, n_hh, pot.hh_evolution, **options)
+    time_ref, W_ref = ho.dop853(t0, W0_hh, h_hh/10, 10*n_hh, 
+                                pot.hh_evolution, rtol=1e-13)
+    return np.max(np.abs(W - W_ref[9::10]))
+
+if __name__ == "__main__":
+    failed = 0
+    print("{:<28}{:>12}".format("integrator", "error"))
+    for name, error, cases in (("Kepler, e = {}".format(e), kepler_error, 
+                                KEPLER_CASES),
+                               ("Hénon-Heiles", hh_error, HH_CASES)):
+        print(name)
+        for case, integrator, options, tol in cases:
+            try:
+                err = error(integrator, options)
+            except Exception as exception:
+                print("{:<28}{:>12}  FAILED ({!r})".format(case, "", 
+                                                           exception))
+                failed += 1
+                continue
+            ok = err <= tol
+            failed += not ok
+            print("{:<28}{:>12.2e}  {}".format(case, err, 
+                                               "ok" if ok else "FAILED"))
+    sys.exit(failed)
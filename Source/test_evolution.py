@@ -41,6 +41,7 @@ import energies as ene
 import integrator as itg
 import initial_conditions as init
 import poincare_sections as pcs
+import trajectory as trj
 
 if "YII_1" in plt.style.available: plt.style.use("YII_1")
 # Loading matplotlib style...
@@ -50,6 +51,9 @@ N_grid = 5000
 h = 0.01
 N_inter = 5000
 eps = 1e-2
+stride = 10 # steps between two plotted states
+MEMMAP = False # trajectory written to (and read lazily from) a file
+TRAJ_FILE = "./Output/evolution.traj"
 
 x_0 = 0.0
 y_0 = 0.5
@@ -65,7 +69,13 @@ if __name__ == "__main__":
     W_part[1,0] = u_0
     W_part[1,1] = v_0
 
-    pos_t, positions = itg.rk4(0, W_part, h, N_inter, pot.hh_evolution)
+    if MEMMAP:
+        positions = trj.integrate_to_file(TRAJ_FILE, 0, W_part, h, N_inter, 
+                                          pot.hh_evolution, 
+                                          stride=stride).W
+    else:
+        pos_t, positions = itg.rk4(0, W_part, h, N_inter, pot.hh_evolution,
+                                   stride=stride)
 
     pos_x = positions[:,0,0]
     pos_y = positions[:,0,1]
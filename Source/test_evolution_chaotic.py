@@ -41,6 +41,8 @@ import energies as ene
 import integrator as itg
 import initial_conditions as init
 import poincare_sections as pcs
+import trajectory as trj
+import parareal as pr
 
 if "YII_1" in plt.style.available: plt.style.use("YII_1")
 # Loading matplotlib style...
@@ -50,6 +52,9 @@ N_grid = 5000
 h = 0.01
 N_inter = 5000
 eps = 1e-2
+MEMMAP = False # trajectory written to (and read lazily from) a file
+TRAJ_FILE = "./Output/evolution_chaotic.traj"
+PARAREAL = False # integration in parallel in time
 
 x_0 = 0.3
 y_0 = 0.1
@@ -65,7 +70,14 @@ if __name__ == "__main__":
     W_part[1,0] = u_0
     W_part[1,1] = v_0
 
-    pos_t, positions = itg.rk4(0, W_part, h, N_inter, pot.hh_evolution)
+    if MEMMAP:
+        positions = trj.integrate_to_file(TRAJ_FILE, 0, W_part, h, N_inter, 
+                                          pot.hh_evolution).W
+    elif PARAREAL:
+        pos_t, positions = pr.parareal(0, W_part, h, N_inter, 
+                                       pot.hh_evolution)
+    else:
+        pos_t, positions = itg.rk4(0, W_part, h, N_inter, pot.hh_evolution)
 
     pos_x = positions[:,0,0]
     pos_y = positions[:,0,1]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Test: Output stride
+
+Checks that the output stride and the output times of every integrator 
+give the same states and times as the full output, and that the final state
+agrees with a reference solution.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+test_output_stride.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import sys
+import numpy as np
+
+import potentials as pot
+import integrator as itg
+import high_order as ho
+import taylor as tay
+
+# parameters
+t0 = 0
+h = 0.1
+n = 100
+stride = 7
+t_out = np.array([0.35, 2.0, 5.12, 9.9])
+W0 = np.array([[[0.1, 0.0, -0.1], [0.2, 0.1, 0.0]],
+               [[0.0, 0.3, 0.2], [0.3, -0.2, 0.35]]])
+TOL_SAME = 1e-12 # stride and t_out against the full output
+
+# (name, integrator, options, tolerance of the final state)
+CASES = [("Euler", itg.euler, {}, 1),
+         ("RK2", itg.rk2, {}, 1e-2),
+         ("RK4", itg.rk4, {}, 1e-5),
+         ("DOP853", ho.dop853, {}, 1e-10),
+         ("DOP853 (rtol)", ho.dop853, {"rtol": 1e-10}, 1e-8),
+         ("Gauss-Radau", ho.gauss_radau, {}, 1e-10),
+         ("Gauss-Radau (eps)", ho.gauss_radau, {"eps": 1e-9}, 1e-8),
+         ("Bulirsch-Stoer", ho.bulirsch_stoer, {}, 1e-10),
+         ("Bulirsch-Stoer (rtol)", ho.bulirsch_stoer, {"rtol": 1e-10}, 1e-8),
+         ("Taylor", tay.taylor, {}, 1e-10)]
+
+def compare(integrator, options: dict) -> tuple:
+    """Compares the strided outputs with the full output
+    @ returns:
+        - err_stride: largest difference with the stride
+        - err_t_out: largest difference with the output times
+        - err_ref: error of the final state against the reference
+    """
+    func = pot.hh_evolution
+    time, W = integrator(t0, W0, h, n, func, **options)
+    err = []
+    for kwargs in ({"stride": stride}, {"t_out": t_out}):
+        steps = itg.output_steps(t0, h, n, **kwargs)
+        time_s, W_s = integrator(t0, W0, h, n, func, **kwargs, **options)
+        err.append(max(np.max(np.abs(time_s - time[steps - 1])),
+                       np.max(np.abs(W_s - W[steps - 1]))))
+    time_ref, W_ref = ho.dop853(t0, W0, h/10, 10*n, func, rtol=1e-12)
+    err.append(np.max(np.abs(W[-1] - W_ref[-1])))
+    return tuple(err)
+
+if __name__ == "__main__":
+    failed = 0
+    print("{:<24}{:>12}{:>12}{:>12}".format("integrator", "stride", 
+                                           "t_out", "reference"))
+    for name, integrator, options, tol_ref in CASES:
+        err_stride, err_t_out, err_ref = compare(integrator, options)
+        ok = err_stride <= TOL_SAME and err_t_out <= TOL_SAME \
+                and err_ref <= tol_ref
+        failed += not ok
+        print("{:<24}{:>12.2e}{:>12.2e}{:>12.2e}  {}".format(
+            name, err_stride, err_t_out, err_ref, "ok" if ok else "FAILED"))
+    sys.exit(failed)
@@ -36,6 +36,7 @@ import time
 import numpy as np
 import main_poincare_sections_linear as lin
 import main_poincare_sections_parallel as par
+import telemetry as tm
 
 E_all = np.array([1/100, 1/12, 1/10, 1/8, 1/6])
 
@@ -43,18 +44,23 @@ par_time = []
 lin_time = []
 
 print("\033[34m" + "Please wait..." + "\033[0m")
+# Progress reported after each energy (interval 0)
+progress = tm.Progress(len(E_all)*par.DEFAULT_N_iter, "parallel", interval=0)
 for E in E_all:
     t_0 = time.time()
     par.compute_poincare_sections_numpy(E)
     t_1 = time.time()
     par_time.append(t_1-t_0)
+    progress.update(par.DEFAULT_N_iter, par.DEFAULT_N_part)
 
 print("\033[34m" + "Still wait..." + "\033[0m")
+progress = tm.Progress(len(E_all)*lin.DEFAULT_N_iter, "linear", interval=0)
 for E in E_all:
     t_0 = time.time()
     lin.compute_poincare_sections_linear(E)
     t_1 = time.time()
     lin_time.append(t_1-t_0)
+    progress.update(lin.DEFAULT_N_iter, lin.DEFAULT_N_part)
 
 print("\033[34m" + "Done!" + "\033[0m")
 print("\033[36m" + "=== [ RESULTS ] ===" + "\033[0m")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Trajectory Files
+
+Full trajectories written directly into a memory-mapped file (np.memmap) in 
+chunks, with an index header (t0, h, n, N, layout), so that long or 
+many-particle runs do not need to fit in memory and can be read lazily.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+trajectory.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import json
+import numpy as np
+
+import integrator as itg
+import planner as pln
+
+MAGIC = b"HHTRAJ01"
+HEADER_SIZE = 4096 # bytes, the data starts on a page boundary
+LAYOUT = "n,2,2,N" # W[i] is the state [[x, y], [u, v]] at time t0 + (i+1) h
+                   # (the particle axes are stored flattened, in C order)
+DTYPE = "float64"
+EXTENSION = ".traj"
+
+def _write_header(file, header: dict):
+    text = json.dumps(header).encode()
+    if len(MAGIC) + len(text) + 1 > HEADER_SIZE:
+        raise ValueError("Trajectory header too long")
+    file.write(MAGIC + text + b"\n")
+    file.write(b" "*(HEADER_SIZE - len(MAGIC) - len(text) - 1))
+
+def _file_shape(header: dict) -> tuple:
+    """Shape of the data in the file: (n, 2, 2) or (n, 2, 2, N)"""
+    return tuple(header["shape"][:3]) \
+            + ((header["N"],) if len(header["shape"]) > 3 else ())
+
+def read_header(filename: str) -> dict:
+    """Index header of a trajectory file
+    @ returns:
+        - header: {"t0", "h", "n", "N", "shape", "layout", "dtype"}
+    """
+    with open(filename, "rb") as file:
+        data = file.read(HEADER_SIZE)
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a trajectory file: {}".format(filename))
+    return json.loads(data[len(MAGIC):].split(b"\n")[0])
+
+class TrajectoryWriter:
+    """Trajectory file written by blocks of steps
+    @ params:
+        - filename: name of the file
+        - t0: initial time
+        - h: time step between two saved states
+        - n: number of saved states
+        - shape: shape of the state vector W0, (2, 2) or (2, 2, ...)
+    """
+    def __init__(self, filename: str, t0: float, h: float, n: int, 
+                 shape: tuple):
+        self.header = {"t0": float(t0),
+                       "h": float(h),
+                       "n": int(n),
+                       "N": int(np.prod(shape[2:], dtype=int)),
+                       "shape": [int(n)] + [int(k) for k in shape],
+                       "layout": LAYOUT,
+                       "dtype": DTYPE}
+        with open(filename, "wb") as file:
+            _write_header(file, self.header)
+        self.filename = filename
+        self.W = np.memmap(filename, dtype=DTYPE, mode="r+", 
+                           offset=HEADER_SIZE, 
+                           shape=_file_shape(self.header))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, i: int, W: np.ndarray, part: slice = None):
+        """Writes the states i, i+1, ... (of the particles part of the 
+        flattened particle axis, all if None)"""
+        if part is None:
+            self.W[i:i+len(W)] = W
+        else:
+            self.W[i:i+len(W), ..., part] = W
+
+    def close(self):
+        if self.W is not None:
+            self.W.flush()
+            self.W = None
+
+class Trajectory:
+    """Trajectory file opened for reading: the states are only read from 
+    the disk when sliced
+    @ params:
+        - filename: name of the file
+    """
+    def __init__(self, filename: str):
+        self.header = read_header(filename)
+        self.filename = filename
+        self.t0 = self.header["t0"]
+        self.h = self.header["h"]
+        self.n = self.header["n"]
+        self.N = self.header["N"]
+        self.W = np.memmap(filename, dtype=self.header["dtype"], mode="r", 
+                           offset=HEADER_SIZE, 
+                           shape=_file_shape(self.header))
+        self.W = self.W.reshape(self.header["shape"])
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, index) -> np.ndarray:
+        return np.asarray(self.W[index])
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.t0 + self.h*np.arange(1, self.n + 1)
+
+def integrate_to_file(filename: str,
+                      t0: float, 
+                      W0: np.ndarray, 
+                      h: float, 
+                      n: int, 
+                      func, 
+                      integrator = itg.rk4,
+                      budget: int = None,
+                      stride: int = 1) -> Trajectory:
+    """Integrates a trajectory directly into a file, in chunks that fit in 
+    the memory budget (see pln.plan)
+    @ params:
+        - filename: name of the file
+        - t0, W0, h, n, func, integrator: see itg.integrator_type
+        - budget: memory budget (bytes), from the available memory if None
+        - stride: number of steps between two saved states
+    @ returns:
+        - trajectory: the file opened for reading
+    """
+    shape = np.shape(W0)
+    N = int(np.prod(shape[2:], dtype=int))
+    # The particles are chunked along a single (flattened) axis
+    if len(shape) > 2:
+        W0 = np.reshape(W0, (2, 2, N))
+    N_chunk, n_chunk = pln.plan("trajectory", n//stride, N, budget)
+    # The chunks end on saved states
+    n_chunk = max(n_chunk, 1)*stride
+    with TrajectoryWriter(filename, t0, stride*h, n//stride, shape) as writer:
+        for start in range(0, N, N_chunk):
+            if len(shape) == 2:
+                part = None
+                w = W0
+            else:
+                part = slice(start, start + N_chunk)
+                w = W0[..., part]
+            t = t0
+            i = 0
+            while i < n:
+                m = min(n_chunk, n - i)
+                time, W = integrator(t, w, h, m, func, stride=stride)
+                if len(W) > 0:
+                    writer.write(i//stride, W, part)
+                    w = W[-1]
+                    t = time[-1]
+                i += m
+    return Trajectory(filename)
@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+"""
+Work Queue
+
+Runs energy sweeps on several machines: a sweep is split into work units 
+(energy x particle chunk x seed) put in a queue on a shared file system, 
+workers (on any node) pull the units and write their results to a binary 
+store. The units are claimed with atomic renames, and a unit whose worker 
+failed or stalled is retried; its seed makes the retry give the same result.
+
+@ Author: Moussouni, Yaël (MSc student) & Bhat, Junaid Ramzan (MSc student)
+@ Institution:  Université de Strasbourg, CNRS, Observatoire astronomique
+                de Strasbourg, UMR 7550, F-67000 Strasbourg, France
+@ Date: 2025-01-01
+
+Licence:
+Order and Chaos in a 2D potential
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+work_queue.py
+Copyright (C) 2025 Yaël Moussouni (yael.moussouni@etu.unistra.fr)
+                   Bhat, Junaid Ramzan (junaid-ramzan.bhat@etu.unistra.fr)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see https://www.gnu.org/licenses/.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import main_poincare_sections_parallel as mpps
+import main_area as ma
+import telemetry as tm
+import planner as pln
+
+QUEUE_DIR = "./Output/queue/"
+STATES = ["pending", "running", "done", "failed"]
+STORE = "store"
+MAX_ATTEMPTS = 3
+LEASE_TIMEOUT = 3600 # s, a running unit not renewed for this is retried
+HEARTBEAT = 60 # s, interval of the lease renewal by the worker
+POLL = 1 # s, waiting time of the workers when no unit is available
+DEFAULT_N_chunk = 100
+
+def run_sections(E: float, N_iter: int, N_part: int, h: float,
+                 budget: int = None) -> dict:
+    """Work unit of the Poincaré sections (see 
+    mpps.compute_poincare_sections_numpy)"""
+    y_section, v_section = mpps.compute_poincare_sections_numpy(
+        E, N_iter, N_part, h, budget=budget)
+    return {"y": np.array(y_section), "v": np.array(v_section)}
+
+def run_mu(E: float, N_iter: int, N_part: int, h: float,
+           budget: int = None) -> dict:
+    """Work unit of the phase-space distances (see ma.compute_mu)"""
+    return {"mu": np.array(ma.compute_mu(E, N_iter, N_part, h, budget))}
+
+TASKS = {"sections": run_sections, 
+         "mu": run_mu}
+
+def make_units(task: str,
+               E_all: np.ndarray,
+               N_part: int,
+               N_iter: int,
+               h: float,
+               N_chunk: int = DEFAULT_N_chunk,
+               N_seed: int = 1,
+               seed: int = 0) -> list:
+    """Splits a sweep into work units
+    @ params:
+        - task: name of the computation (key of TASKS)
+        - E_all: the energies
+        - N_part: the number of particles per energy and seed
+        - N_iter: the number of iteration
+        - h: integration steps
+        - N_chunk: the number of particles per unit
+        - N_seed: the number of seeds (independent samples) per energy
+        - seed: first seed
+    @ returns:
+        - units: list of the units (dict)
+    """
+    if task not in TASKS:
+        raise KeyError("Unknown task: {}".format(task))
+    units = []
+    for i, E in enumerate(E_all):
+        for k in range(N_seed):
+            for j, start in enumerate(range(0, N_part, N_chunk)):
+                units.append({"id": "{}_{}_{}_{}".format(task, i, k, j),
+                              "task": task,
+                              "i_E": i,
+                              "E": float(E),
+                              "seed": int(seed + len(units)),
+                              "N_part": min(N_chunk, N_part - start),
+                              "N_iter": int(N_iter),
+                              "h": float(h),
+                              "attempts": 0})
+    return units
+
+class FileQueue:
+    """Queue of work units in a directory (shared between the nodes): each
+    unit is a JSON file moved between the pending, running, done and failed 
+    directories, and its result is a .npz file of the store directory"""
+    def __init__(self, path: str = QUEUE_DIR):
+        self.path = path
+        for state in STATES + [STORE]:
+            os.makedirs(os.path.join(path, state), exist_ok=True)
+
+    def _file(self, state: str, unit_id: str) -> str:
+        return os.path.join(self.path, state, unit_id + ".json")
+
+    def _write(self, filename: str, unit: dict):
+        """Writes a unit file atomically"""
+        tmp = "{}.{}.tmp".format(filename, os.getpid())
+        with open(tmp, "w") as file:
+            json.dump(unit, file)
+        os.replace(tmp, filename)
+
+    def _ids(self, state: str) -> list:
+        return sorted(f[:-5] for f in os.listdir(os.path.join(self.path, 
+                                                              state))
+                      if f.endswith(".json"))
+
+    def put(self, units: list):
+        """Adds units to the queue (the units already in the queue, in any 
+        state, are left untouched)"""
+        known = set()
+        for state in STATES:
+            known.update(self._ids(state))
+        for unit in units:
+            if unit["id"] not in known:
+                self._write(self._file("pending", unit["id"]), unit)
+
+    def claim(self) -> dict:
+        """Takes a pending unit, or returns None if there are none"""
+        for unit_id in self._ids("pending"):
+            pending = self._file("pending", unit_id)
+            running = self._file("running", unit_id)
+            try:
+                # The lease starts at the claim (rename keeps the mtime)
+                os.utime(pending)
+                os.rename(pending, running)
+            except FileNotFoundError:
+                continue # claimed by another worker
+            with open(running) as file:
+                return json.load(file)
+        return None
+
+    def renew(self, unit: dict) -> bool:
+        """Renews the lease of a running unit
+        @ returns:
+            - False if the unit is no longer running (e.g. released)
+        """
+        try:
+            os.utime(self._file("running", unit["id"]))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, unit: dict):
+        """Marks a running unit as done"""
+        try:
+            os.rename(self._file("running", unit["id"]), 
+                      self._file("done", unit["id"]))
+        except FileNotFoundError:
+            pass # already completed by another worker after a retry
+
+    def release(self, unit: dict, max_attempts: int = MAX_ATTEMPTS):
+        """Puts back a running unit whose computation failed (or moves it to
+        failed after max_attempts)"""
+        unit = dict(unit, attempts=unit["attempts"] + 1)
+        state = "pending" if unit["attempts"] < max_attempts else "failed"
+        self._write(self._file(state, unit["id"]), unit)
+        try:
+            os.remove(self._file("running", unit["id"]))
+        except FileNotFoundError:
+            pass
+
+    def requeue_stale(self, timeout: float = LEASE_TIMEOUT,
+                      max_attempts: int = MAX_ATTEMPTS) -> int:
+        """Releases the running units whose lease was not renewed for 
+        timeout seconds (their worker died or stalled)
+        @ returns:
+            - the number of released units
+        """
+        N = 0
+        now = time.time()
+        for unit_id in self._ids("running"):
+            running = self._file("running", unit_id)
+            try:
+                if now - os.path.getmtime(running) < timeout:
+                    continue
+                with open(running) as file:
+                    unit = json.load(file)
+            except FileNotFoundError:
+                continue
+            self.release(unit, max_attempts)
+            N += 1
+        return N
+
+    def units(self, state: str) -> list:
+        """Units in a given state"""
+        units = []
+        for unit_id in self._ids(state):
+            try:
+                with open(self._file(state, unit_id)) as file:
+                    units.append(json.load(file))
+            except FileNotFoundError:
+                continue
+        return units
+
+    def status(self) -> dict:
+        """Number of units in each state"""
+        return {state: len(self._ids(state)) for state in STATES}
+
+    def result_file(self, unit_id: str) -> str:
+        return os.path.join(self.path, STORE, unit_id + ".npz")
+
+    def has_result(self, unit_id: str) -> bool:
+        return os.path.exists(self.result_file(unit_id))
+
+    def write_result(self, unit_id: str, result: dict):
+        """Writes the result of a unit atomically (a retry overwrites it 
+        with the same values)"""
+        filename = self.result_file(unit_id)
+        tmp = "{}.{}.{}.tmp.npz".format(filename[:-4], socket.gethostname(),
+                                        os.getpid())
+        np.savez(tmp, **result)
+        os.replace(tmp, filename)
+
+    def read_result(self, unit_id: str) -> dict:
+        with np.load(self.result_file(unit_id)) as data:
+            return dict(data)
+
+class Lease:
+    """Renews the lease of a running unit every interval seconds from a 
+    thread, while the unit is computed (used as a context manager)"""
+    def __init__(self, queue: FileQueue, unit: dict, 
+                 interval: float = HEARTBEAT):
+        self.queue = queue
+        self.unit = unit
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew, daemon=True)
+
+    def _renew(self):
+        while not self._stop.wait(self.interval):
+            if not self.queue.renew(self.unit):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def run_unit(unit: dict, budget: int = None) -> dict:
+    """Computes a unit (the random initial conditions are drawn from the 
+    seed of the unit) within a memory budget (bytes, see pln.plan)"""
+    np.random.seed(unit["seed"])
+    return TASKS[unit["task"]](unit["E"], unit["N_iter"], unit["N_part"], 
+                               unit["h"], budget)
+
+def worker(path: str = QUEUE_DIR,
+           wait: bool = False,
+           timeout: float = LEASE_TIMEOUT,
+           max_attempts: int = MAX_ATTEMPTS,
+           progress_queue = None,
+           budget: int = None,
+           heartbeat: float = HEARTBEAT) -> int:
+    """Pulls and computes units until the queue is empty
+    @ params:
+        - path: directory of the queue
+        - wait: if True, waits for the running units of the other workers 
+          (and retries them if they stall) instead of stopping
+        - timeout: lease of a running unit (s)
+        - max_attempts: number of attempts before a unit is marked failed
+        - progress_queue: queue of a tm.Monitor receiving the progress of 
+          this worker (reported on stderr if None)
+        - budget: memory budget of this worker (bytes), from the available
+          memory if None
+        - heartbeat: interval of the lease renewal (s), less than timeout
+    @ returns:
+        - the number of units computed by this worker
+    """
+    queue = FileQueue(path)
+    progress = tm.Progress(name="worker", sink=progress_queue)
+    N = 0
+    while True:
+        unit = queue.claim()
+        if unit is None:
+            queue.requeue_stale(timeout, max_attempts)
+            if wait and queue.status()["running"] > 0:
+                time.sleep(POLL)
+                continue
+            unit = queue.claim()
+            if unit is None:
+                progress.close()
+                return N
+        try:
+            if not queue.has_result(unit["id"]):
+                with Lease(queue, unit, heartbeat):
+                    result = run_unit(unit, budget)
+                queue.write_result(unit["id"], result)
+                N += 1
+                progress.update(unit["N_iter"], unit["N_part"])
+        except Exception as error:
+            print("{}: {!r}".format(unit["id"], error), file=sys.stderr)
+            queue.release(unit, max_attempts)
+            continue
+        queue.complete(unit)
+
+def run_local(path: str = QUEUE_DIR, 
+              max_workers: int = None,
+              output: str = None,
+              port: int = None) -> dict:
+    """Runs the workers on this machine, in a process pool, with their 
+    progress aggregated (the memory budget is shared between the workers)
+    @ params:
+        - path: directory of the queue
+        - max_workers: number of processes (all the cores if None)
+        - output: JSON-lines file of the progress (stderr if None)
+        - port: local port of the HTTP status endpoint (none if None)
+    @ returns:
+        - the status of the queue
+    """
+    max_workers = max_workers or os.cpu_count()
+    budget = pln.default_budget()//max_workers
+    total = sum(unit["N_iter"] 
+                for unit in FileQueue(path).units("pending"))
+    with tm.Monitor(total, "queue", output, port=port) as monitor:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for future in [pool.submit(worker, path, True, 
+                                       progress_queue=monitor.queue,
+                                       budget=budget) 
+                           for _ in range(max_workers)]:
+                future.result()
+    return FileQueue(path).status()
+
+def collect(path: str, units: list) -> dict:
+    """Gathers the results of the units per energy (in the order of the 
+    units)
+    @ params:
+        - path: directory of the queue
+        - units: the units of the sweep (see make_units)
+    @ returns:
+        - results: {i_E: {name: concatenated array}}
+    """
+    queue = FileQueue(path)
+    results = {}
+    for unit in units:
+        result = queue.read_result(unit["id"])
+        arrays = results.setdefault(unit["i_E"], {})
+        for name, value in result.items():
+            arrays.setdefault(name, []).append(value)
+    return {i_E: {name: np.concatenate(value) 
+                  for name, value in arrays.items()}
+            for i_E, arrays in results.items()}
+
+if __name__ == "__main__":
+    # python work_queue.py [QUEUE_DIR] [sections|mu]: fills the queue (if 
+    # needed) and runs a worker; the same command on other nodes sharing 
+    # QUEUE_DIR adds workers
+    path = sys.argv[1] if len(sys.argv) > 1 else QUEUE_DIR
+    task = sys.argv[2] if len(sys.argv) > 2 else "sections"
+    if task == "sections":
+        units = make_units(task, mpps.E_all, mpps.DEFAULT_N_part, 
+                           mpps.DEFAULT_N_iter, mpps.DEFAULT_h)
+    else:
+        units = make_units(task, ma.E_all, ma.DEFAULT_N_part, 
+                           ma.DEFAULT_N_iter, ma.DEFAULT_h)
+    queue = FileQueue(path)
+    queue.put(units)
+    worker(path, wait=True)
+    print(queue.status())
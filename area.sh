@@ -1,5 +1,4 @@
 #!/usr/bin/env bash
 
 source activate.sh
-venv/bin/python Source/main_area.py
-venv/bin/python Source/plot_area.py
+venv/bin/python Source/cli.py area
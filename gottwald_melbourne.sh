@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 
 source activate.sh
-venv/bin/python Source/gottwald_melbourne.py
+venv/bin/python Source/cli.py gm
@@ -1,5 +1,4 @@
 #!/usr/bin/env bash
 
 source activate.sh
-venv/bin/python Source/main_poincare_sections_linear.py
-venv/bin/python Source/plot_poincare_sections.py
+venv/bin/python Source/cli.py sections --linear
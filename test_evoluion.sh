@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 
 source activate.sh
-venv/bin/python Source/test_evolution.py
+venv/bin/python Source/cli.py test evolution
@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 
 source activate.sh
-venv/bin/python Source/test_potentials.py
+venv/bin/python Source/cli.py test potentials
@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 
 source activate.sh
-venv/bin/python Source/time_poincare_sections.py
+venv/bin/python Source/cli.py time